@@ -1,16 +1,68 @@
+from typing import Optional
+
+from longplexpy.barcodes.schema import DEFAULT_BARCODE_SCHEMA
+from longplexpy.barcodes.schema import BarcodeInfo
+from longplexpy.barcodes.schema import BarcodeSchema
+
+_barcode_schema: BarcodeSchema = DEFAULT_BARCODE_SCHEMA
+"""The barcode schema used by every barcode parser."""
+
+
+def get_barcode_schema() -> BarcodeSchema:
+    """Get the barcode schema used by every barcode parser."""
+    return _barcode_schema
+
+
+def set_barcode_schema(schema: BarcodeSchema) -> None:
+    """Set the barcode schema used by every barcode parser."""
+    global _barcode_schema
+    _barcode_schema = schema
+
+
+def parse_barcode(barcode_name: str) -> Optional[BarcodeInfo]:
+    """Parse a barcode name with the active barcode schema
+
+    Args:
+        barcode_name: Barcode name expected to adhere to the barcode schema, by default
+            [Prefix]_[Barcode Set]_[Well]_[Adapter]
+    Returns:
+        The barcode set, well and adapter of the barcode, or None if the name does not match
+    """
+    return _barcode_schema.lookup(barcode_name)
+
+
+def try_well_from_barcode(barcode_name: str) -> Optional[str]:
+    """Identify barcode well from barcode name, or None if the name does not match the schema
+
+    Args:
+        barcode_name: Barcode name expected to adhere to the barcode schema, by default
+            [Prefix]_[Barcode Set]_[Well]_[Adapter]
+    """
+    info = _barcode_schema.lookup(barcode_name)
+    return None if info is None else info.well
+
+
+def try_barcode_set_from_barcode(barcode_name: str) -> Optional[str]:
+    """Identify barcode set from barcode name, or None if the name does not match the schema
+
+    Args:
+        barcode_name: Barcode name expected to adhere to the barcode schema, by default
+            [Prefix]_[Barcode Set]_[Well]_[Adapter]
+    """
+    info = _barcode_schema.lookup(barcode_name)
+    return None if info is None else info.barcode_set
+
+
 def well_from_barcode(barcode_name: str) -> str:
     """Identify barcode well from barcode name
 
     Args:
-        barcode_name: Barcode name expected to adhere to pattern
-            seqwell_[Barcode Set]_[Well]_[Adapter]
+        barcode_name: Barcode name expected to adhere to the barcode schema, by default
+            [Prefix]_[Barcode Set]_[Well]_[Adapter]
     Raises:
-        ValueError if barcode name is not split into 4 elements by underscores
+        ValueError if barcode name does not match the barcode schema
     """
-    split_barcode = barcode_name.split("_")
-    if len(split_barcode) != 4:
-        raise ValueError(
-            f"Barcode, ${barcode_name} does not match expected pattern"
-            "seqwell_[Barcode Set]_[Well]_[Adapter]"
-        )
-    return split_barcode[2]
+    well = try_well_from_barcode(barcode_name)
+    if well is None:
+        raise ValueError(f"Barcode, {barcode_name} does not match the barcode schema")
+    return well
@@ -0,0 +1,235 @@
+import string
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from typing import Any
+from typing import Iterable
+from typing import NamedTuple
+from typing import Optional
+
+
+class BarcodeInfo(NamedTuple):
+    """The fields of a barcode name.
+
+    Attributes:
+        barcode_set: the name of the barcode set, e.g. UDI1.
+        well: the well of the barcode, e.g. A01.
+        adapter: the adapter of the barcode, e.g. P5.
+    """
+
+    barcode_set: str
+    well: str
+    adapter: str
+
+
+class AdapterRoles(NamedTuple):
+    """The adapter names of the i5 and i7 barcodes of a well.
+
+    Attributes:
+        i5: the adapter name of i5 barcodes, e.g. P5.
+        i7: the adapter name of i7 barcodes, e.g. P7.
+    """
+
+    i5: str = "P5"
+    i7: str = "P7"
+
+
+@dataclass(frozen=True)
+class PlateGeometry:
+    """The geometry of a barcode plate.
+
+    Wells are named by a row letter and a zero-padded column number, e.g. A01 to H12.
+
+    Attributes:
+        rows: the number of rows, lettered from A.
+        columns: the number of columns, numbered from 1.
+    """
+
+    rows: int = 8
+    columns: int = 12
+
+    def __post_init__(self) -> None:
+        if not 1 <= self.rows <= len(string.ascii_uppercase):
+            raise ValueError(f"Plate rows must be between 1 and 26, found {self.rows}")
+        if self.columns < 1:
+            raise ValueError(f"Plate columns must be at least 1, found {self.columns}")
+
+    @property
+    def wells(self) -> list[str]:
+        """Every well of the plate, in row-major order."""
+        return [
+            f"{row}{column:02d}"
+            for row in string.ascii_uppercase[: self.rows]
+            for column in range(1, self.columns + 1)
+        ]
+
+
+@dataclass(frozen=True)
+class BarcodeSchema:
+    """A declarative description of barcode names of the form
+    [Prefix][separator][Barcode Set][separator][Well][separator][Adapter]
+
+    Every field that is not given is unconstrained, so the default schema recognizes any name with
+    four fields. The schema is compiled into lookup tables when it is created, so parsing a barcode
+    name is a dictionary lookup. When every field is constrained, every valid barcode name is
+    precomputed; otherwise names are parsed once by splitting on the separator and then cached.
+
+    Attributes:
+        prefix: the first field of every barcode name. If None, any prefix is recognized.
+        separator: the string separating fields of a barcode name.
+        barcode_sets: the recognized barcode set names. If empty, any barcode set name is
+            recognized.
+        adapters: the i5 and i7 adapter names. If None, any adapter name is recognized, and P5 and
+            P7 are the i5 and i7 adapters.
+        plate: the geometry of the barcode plate, which defines the recognized wells. If None, any
+            well name is recognized.
+    """
+
+    prefix: Optional[str] = None
+    separator: str = "_"
+    barcode_sets: tuple[str, ...] = ()
+    adapters: Optional[AdapterRoles] = None
+    plate: Optional[PlateGeometry] = None
+    _wells: Optional[frozenset[str]] = field(init=False, repr=False, compare=False)
+    _table: dict[str, Optional[BarcodeInfo]] = field(init=False, repr=False, compare=False)
+    _precomputed: bool = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.separator == "":
+            raise ValueError("Barcode schema separator must not be empty")
+        _check_field_values(self.barcode_sets, self.separator, "barcode set")
+        if self.adapters is not None:
+            _check_field_values(self.adapters, self.separator, "adapter")
+            if self.adapters.i5 == self.adapters.i7:
+                raise ValueError(f"The i5 and i7 adapters must differ, found {self.adapters}")
+
+        wells = None if self.plate is None else self.plate.wells
+        table: dict[str, Optional[BarcodeInfo]] = {}
+        if self.prefix is not None and self.adapters is not None and wells is not None:
+            for barcode_set in self.barcode_sets:
+                for well in wells:
+                    for adapter in self.adapters:
+                        name = self.separator.join([self.prefix, barcode_set, well, adapter])
+                        table[name] = BarcodeInfo(barcode_set, well, adapter)
+
+        object.__setattr__(self, "_wells", None if wells is None else frozenset(wells))
+        object.__setattr__(self, "_table", table)
+        # names are only precomputed when every field is constrained
+        object.__setattr__(self, "_precomputed", len(table) > 0)
+
+    @property
+    def adapter_roles(self) -> AdapterRoles:
+        """The adapter names of the i5 and i7 barcodes of a well."""
+        return AdapterRoles() if self.adapters is None else self.adapters
+
+    def lookup(self, barcode_name: str) -> Optional[BarcodeInfo]:
+        """Get the fields of a barcode name, or None if it does not match the schema."""
+        if barcode_name in self._table:
+            return self._table[barcode_name]
+        if self._precomputed:
+            # every valid name was precomputed, so there is nothing left to parse
+            return None
+        info = self._parse(barcode_name)
+        self._table[barcode_name] = info
+        return info
+
+    def _parse(self, barcode_name: str) -> Optional[BarcodeInfo]:
+        """Parse a barcode name by splitting it on the separator."""
+        if self.prefix is None:
+            fields = barcode_name.split(self.separator)
+        else:
+            head = self.prefix + self.separator
+            if not barcode_name.startswith(head):
+                return None
+            fields = [self.prefix, *barcode_name[len(head) :].split(self.separator)]
+        if len(fields) != 4 or "" in fields:
+            return None
+        _, barcode_set, well, adapter = fields
+        if len(self.barcode_sets) > 0 and barcode_set not in self.barcode_sets:
+            return None
+        if self._wells is not None and well not in self._wells:
+            return None
+        if self.adapters is not None and adapter not in self.adapters:
+            return None
+        return BarcodeInfo(barcode_set=barcode_set, well=well, adapter=adapter)
+
+    @classmethod
+    def from_dict(cls, config: dict[str, Any]) -> "BarcodeSchema":
+        """Build a barcode schema from a dictionary, e.g. parsed from TOML or YAML.
+
+        Keys that are not given take the values of `LONGPLEX_BARCODE_SCHEMA`, so the prefix,
+        adapters and wells of barcode names are always checked.
+
+        Raises:
+            ValueError if the dictionary has unrecognized keys or invalid values.
+        """
+        _check_keys(config, {"prefix", "separator", "barcode_sets", "adapters", "plate"}, "")
+        adapters = _table(config, "adapters")
+        _check_keys(adapters, set(AdapterRoles._fields), "adapters ")
+        plate = _table(config, "plate")
+        _check_keys(plate, {"rows", "columns"}, "plate ")
+
+        return cls(
+            prefix=str(config.get("prefix", LONGPLEX_BARCODE_SCHEMA.prefix)),
+            separator=str(config.get("separator", LONGPLEX_BARCODE_SCHEMA.separator)),
+            barcode_sets=tuple(str(s) for s in config.get("barcode_sets", [])),
+            adapters=AdapterRoles(**{role: str(name) for role, name in adapters.items()}),
+            plate=PlateGeometry(**{key: int(value) for key, value in plate.items()}),
+        )
+
+    @classmethod
+    def from_file(cls, path: Path) -> "BarcodeSchema":
+        """Read a barcode schema from a TOML (.toml) or YAML (.yaml, .yml) file.
+
+        Raises:
+            ValueError if the file type is not recognized or the schema is invalid.
+        """
+        if path.suffix == ".toml":
+            import tomllib
+
+            with open(path, mode="rb") as in_file:
+                config = tomllib.load(in_file)
+        elif path.suffix in (".yaml", ".yml"):
+            import yaml
+
+            with open(path) as in_file:
+                config = yaml.safe_load(in_file) or {}
+        else:
+            raise ValueError(f"Barcode schema must be a .toml, .yaml or .yml file, found {path}")
+        return cls.from_dict(config)
+
+
+def _check_field_values(values: Iterable[str], separator: str, name: str) -> None:
+    """Raise a ValueError if a value of a barcode name field is empty or contains the separator."""
+    for value in values:
+        if value == "" or separator in value:
+            raise ValueError(f"Invalid {name} name in barcode schema: {value!r}")
+
+
+def _table(config: dict[str, Any], key: str) -> dict[str, Any]:
+    """Get a nested table of a barcode schema, or an empty table if it is not given."""
+    table = config.get(key, {})
+    if not isinstance(table, dict):
+        raise ValueError(f"Barcode schema {key} must be a table, found {table!r}")
+    return table
+
+
+def _check_keys(table: dict[str, Any], known_keys: set[str], name: str) -> None:
+    """Raise a ValueError if a table of a barcode schema has unrecognized keys."""
+    unknown_keys = set(table).difference(known_keys)
+    if len(unknown_keys) > 0:
+        raise ValueError(f"Unrecognized barcode schema {name}keys: {sorted(unknown_keys)}")
+
+
+DEFAULT_BARCODE_SCHEMA: BarcodeSchema = BarcodeSchema()
+"""The default barcode schema, which recognizes any name of the form
+[Prefix]_[Barcode Set]_[Well]_[Adapter]"""
+
+LONGPLEX_BARCODE_SCHEMA: BarcodeSchema = BarcodeSchema(
+    prefix="seqwell",
+    adapters=AdapterRoles(i5="P5", i7="P7"),
+    plate=PlateGeometry(rows=8, columns=12),
+)
+"""The seqWell LongPlex barcode schema: seqwell_[Barcode Set]_[A01-H12]_[P5|P7]
+
+Barcode schema files are checked against this schema for any keys they do not give."""
@@ -1,35 +1,104 @@
-from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Iterator
+from typing import Optional
 
-from fgpyo.util.metric import Metric
+from longplexpy.barcodes import try_well_from_barcode
+from longplexpy.malformed import MALFORMED_COLUMN_COUNT
+from longplexpy.malformed import MalformedRows
+from longplexpy.prometheus import RUN_METRICS
 
-from longplexpy.barcodes import well_from_barcode
+if TYPE_CHECKING:
+    from longplexpy.lima.metrics import LimaReportMetric as LimaReportMetric
+    from longplexpy.lima.metrics import StageFlowMetric as StageFlowMetric
+    from longplexpy.lima.metrics import ZmwTransitionMetric as ZmwTransitionMetric
 
 PASS_STATUS = "pass"
 HYBRID_STATUS = "undesired_hybrid"
 
+UNASSIGNED_STATE = "-"
+"""The stage state of a ZMW which is absent from, or did not pass the filters of, a lima.report"""
 
-@dataclass(frozen=True)
-class LimaReportMetric(Metric["LimaReportMetric"]):
-    """A dataclass that captures relevant portions of the *.lima.report
+TRANSITION_I7_AND_I5_ONLY = "i7_i5_only"
+TRANSITION_I7_OR_I5_ONLY = "either_i7_i5_only"
+TRANSITION_DOUBLE_ASSIGNED = "double_assigned"
+TRANSITION_DOUBLE_ASSIGNED_CONFLICT = "double_assigned_conflict"
+TRANSITION_UNASSIGNED = "unassigned"
 
-    Attributes:
-        ZMW: name of the ZMW Lima is reporting on. Note this will not necessarily match the
-            read name in the input BAM. Notably "/ccs" will be stripped off.
-        IdxLowestNamed: the name of the barcode occurring first in the read
-        IdxHighestNamed: the name of the barcode occuring last in the read
+
+def zmw_sort_key(zmw: str) -> tuple[str, int, str]:
+    """Key for ordering ZMW names as they appear in a lima.report (by movie then hole number)
+
+    Args:
+        zmw: name of the ZMW, expected to adhere to pattern [Movie]/[Hole Number](/[Suffix])
     """
+    movie, _, rest = zmw.partition("/")
+    hole, _, suffix = rest.partition("/")
+    return (movie, int(hole) if hole.isdigit() else -1, suffix)
+
+
+def classify_barcodes(lowest_named: str, highest_named: str) -> Optional[str]:
+    """Classify a ZMW by its barcodes without raising on unexpected barcode names
+
+    Args:
+        lowest_named: the name of the barcode occurring first in the read
+        highest_named: the name of the barcode occurring last in the read
+    Returns:
+        The well of both barcodes, "undesired_hybrid" if they are from different wells, or None
+        if either barcode name does not match the expected pattern.
+    """
+    lowest_well = try_well_from_barcode(lowest_named)
+    highest_well = try_well_from_barcode(highest_named)
+    if lowest_well is None or highest_well is None:
+        return None
+    return lowest_well if lowest_well == highest_well else HYBRID_STATUS
+
+
+def read_lima_report_header(lima_report: Path) -> list[str]:
+    """Read the column names from the header of a lima.report"""
+    with open(lima_report) as in_file:
+        return in_file.readline().rstrip("\r\n").split("\t")
+
+
+def iter_lima_report_rows(lima_report: Path, malformed: MalformedRows) -> Iterator[list[str]]:
+    """Stream the fields of each row of a lima.report, without building Metric objects
+
+    The header and blank lines are skipped. Rows with a different number of fields than the
+    header are handled by `malformed`.
+
+    Args:
+        lima_report: the lima.report file to read.
+        malformed: how rows with the wrong number of fields are handled.
+    """
+    # read bytes and decode each line, so the bytes read are counted exactly as they are on disk
+    with open(lima_report, mode="rb") as in_file:
+        header = in_file.readline()
+        RUN_METRICS.bytes_in += len(header)
+        num_columns = len(header.split(b"\t"))
+        for lineno, line in enumerate(in_file, 2):
+            RUN_METRICS.bytes_in += len(line)
+            stripped = line.decode().rstrip("\r\n")
+            if not stripped:
+                continue
+            fields = stripped.split("\t")
+            if len(fields) != num_columns:
+                malformed.record(
+                    MALFORMED_COLUMN_COUNT,
+                    f"In file: {lima_report}, expected {num_columns} columns, got {len(fields)}"
+                    f" on line {lineno}: {stripped}",
+                )
+                continue
+            yield fields
+
+
+_LAZY_METRICS = {"LimaReportMetric", "StageFlowMetric", "ZmwTransitionMetric"}
+"""Metric classes which are only imported, along with fgpyo, when first accessed."""
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_METRICS:
+        from longplexpy.lima import metrics
 
-    ZMW: str
-    IdxLowestNamed: str
-    IdxHighestNamed: str
-
-    @property
-    def status(self) -> str:
-        """Get ZMW filter status from row (as dict) of lima.report
-        Args:
-            row: row from lima.report file as a dictionary
-        """
-        if well_from_barcode(self.IdxHighestNamed) != well_from_barcode(self.IdxLowestNamed):
-            return HYBRID_STATUS
-        else:
-            return PASS_STATUS
+        return getattr(metrics, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,76 @@
+from dataclasses import dataclass
+
+from fgpyo.util.metric import Metric
+
+from longplexpy.barcodes import well_from_barcode
+from longplexpy.lima import HYBRID_STATUS
+from longplexpy.lima import PASS_STATUS
+
+
+@dataclass(frozen=True)
+class LimaReportMetric(Metric["LimaReportMetric"]):
+    """A dataclass that captures relevant portions of the *.lima.report
+
+    Attributes:
+        ZMW: name of the ZMW Lima is reporting on. Note this will not necessarily match the
+            read name in the input BAM. Notably "/ccs" will be stripped off.
+        IdxLowestNamed: the name of the barcode occurring first in the read
+        IdxHighestNamed: the name of the barcode occuring last in the read
+    """
+
+    ZMW: str
+    IdxLowestNamed: str
+    IdxHighestNamed: str
+
+    @property
+    def status(self) -> str:
+        """Get ZMW filter status from row (as dict) of lima.report
+        Args:
+            row: row from lima.report file as a dictionary
+        """
+        if well_from_barcode(self.IdxHighestNamed) != well_from_barcode(self.IdxLowestNamed):
+            return HYBRID_STATUS
+        else:
+            return PASS_STATUS
+
+
+@dataclass(frozen=True)
+class ZmwTransitionMetric(Metric["ZmwTransitionMetric"]):
+    """How a single ZMW was assigned across the i7_i5 and either_i7_i5 demultiplexing stages
+
+    Attributes:
+        ZMW: name of the ZMW.
+        i7_i5: the well the ZMW was assigned in the i7_i5 stage, "undesired_hybrid", or "-" if it
+            was not assigned in this stage.
+        either_i7_i5: the well the ZMW was assigned in the either_i7_i5 stage, "undesired_hybrid",
+            or "-" if it was not assigned in this stage.
+        transition: how the ZMW moved between stages, one of "i7_i5_only", "either_i7_i5_only",
+            "double_assigned", "double_assigned_conflict" or "unassigned".
+    """
+
+    ZMW: str
+    i7_i5: str
+    either_i7_i5: str
+    transition: str
+
+
+@dataclass(frozen=True)
+class StageFlowMetric(Metric["StageFlowMetric"]):
+    """Counts of ZMWs per well for each transition between demultiplexing stages
+
+    ZMWs assigned in both stages are attributed to the well of the i7_i5 stage.
+
+    Attributes:
+        well: the well the ZMWs were assigned to.
+        i7_i5_only: the number of ZMWs assigned only in the i7_i5 stage.
+        either_i7_i5_only: the number of ZMWs assigned only in the either_i7_i5 stage.
+        double_assigned: the number of ZMWs assigned to this well in both stages.
+        double_assigned_conflict: the number of ZMWs assigned to this well in the i7_i5 stage and
+            to a different well in the either_i7_i5 stage.
+    """
+
+    well: str
+    i7_i5_only: int = 0
+    either_i7_i5_only: int = 0
+    double_assigned: int = 0
+    double_assigned_conflict: int = 0
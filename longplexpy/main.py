@@ -1,13 +1,87 @@
+import argparse
+import importlib
 import logging
 import sys
+from pathlib import Path
 from typing import Callable
+from typing import Dict
 from typing import List
 
-import defopt
+_tools: List[str] = ["list_undesired_hybrids", "split_lima_report", "reconcile_demux_stages"]
+"""The command line tools, each defined by a function of the same name in longplexpy.tools.
 
-from longplexpy.tools.list_undesired_hybrids import list_undesired_hybrids
+Tools are imported only when selected, so that running one tool, or asking for its help, does not
+pay the cost of importing every other tool and its dependencies.
+"""
 
-_tools: List[Callable] = [list_undesired_hybrids]
+
+_SHORT_FLAGS: Dict[str, str] = {
+    "lima-report": "l",
+    "output": "o",
+    "read-name-suffix": "r",
+    "output-dir": "o",
+    "shard-by": "s",
+    "prefix": "p",
+    "max-open-files": "m",
+    "buffer-size": "b",
+    "i7-i5-report": "i",
+    "either-i7-i5-report": "e",
+    "output-prefix": "o",
+}
+"""The short flags of the tools' options.
+
+defopt only generates a short flag for an option whose initial is unique within its tool, so the
+flags are pinned here to keep, e.g., -o for --output alongside --on-malformed.
+"""
+
+
+def load_tool(name: str) -> Callable:
+    """Import a command line tool from the module of the same name in longplexpy.tools."""
+    module = importlib.import_module(f"longplexpy.tools.{name}")
+    tool: Callable = getattr(module, name)
+    return tool
+
+
+def selected_tools(argv: List[str]) -> List[str]:
+    """The names of the tools needed to run the given arguments.
+
+    If the first argument is a tool's subcommand, only that tool is needed. Otherwise, e.g. for
+    top-level help, every tool is needed.
+    """
+    if len(argv) > 0:
+        for name in _tools:
+            if argv[0] == name.replace("_", "-"):
+                return [name]
+    return _tools
+
+
+_GLOBAL_OPTIONS_EPILOG = (
+    "To parse barcode names with a custom barcode schema, pass --barcode-schema PATH to a TOML or"
+    " YAML file before the tool name. To export run metrics for the Prometheus node-exporter"
+    " textfile collector, pass --metrics-file PATH (and optionally --metrics-sample NAME and"
+    " --metrics-interval SECONDS) before the tool name."
+)
+
+
+def parse_global_options(argv: List[str]) -> tuple[argparse.Namespace, List[str]]:
+    """Separate the options of the longplexpy entry point from the arguments of the tools.
+
+    Entry point options are only recognized before the tool name. Any arguments after it,
+    including options with the same names, are left for the tool.
+
+    Returns:
+        The entry point options, and the remaining arguments to be passed to defopt.
+    """
+    parser = argparse.ArgumentParser(prog="longplexpy", add_help=False, allow_abbrev=False)
+    parser.add_argument("--barcode-schema", type=Path, default=None)
+    parser.add_argument("--metrics-file", type=Path, default=None)
+    parser.add_argument("--metrics-sample", type=str, default="")
+    parser.add_argument("--metrics-interval", type=float, default=15.0)
+
+    subcommands = {name.replace("_", "-") for name in _tools}
+    tool_index = next((i for i, arg in enumerate(argv) if arg in subcommands), len(argv))
+    options, remaining = parser.parse_known_args(argv[:tool_index])
+    return options, remaining + argv[tool_index:]
 
 
 def setup_logging(level: str = "INFO") -> None:
@@ -24,11 +98,33 @@ def setup_logging(level: str = "INFO") -> None:
 
 def run() -> None:
     """Sets up logging then hands over to defopt for running command line tools."""
+    import defopt
+
     setup_logging()
     logger = logging.getLogger("longplexpy")
     logger.info("Executing: " + " ".join(sys.argv))
-    defopt.run(
-        funcs=_tools,
-        argv=sys.argv[1:],
-    )
+    options, argv = parse_global_options(sys.argv[1:])
+    tools = selected_tools(argv)
+    funcs = [load_tool(name) for name in tools]
+    argparse_kwargs = {"epilog": _GLOBAL_OPTIONS_EPILOG}
+    defopt_kwargs = {"short": _SHORT_FLAGS, "argparse_kwargs": argparse_kwargs}
+
+    if options.barcode_schema is not None:
+        from longplexpy.barcodes import set_barcode_schema
+        from longplexpy.barcodes.schema import BarcodeSchema
+
+        set_barcode_schema(BarcodeSchema.from_file(options.barcode_schema))
+
+    if options.metrics_file is None:
+        defopt.run(funcs=funcs, argv=argv, **defopt_kwargs)
+    else:
+        from longplexpy.prometheus import RunMetricsReporter
+
+        with RunMetricsReporter(
+            path=options.metrics_file,
+            tool=tools[0] if len(tools) == 1 else "longplexpy",
+            sample=options.metrics_sample,
+            interval=options.metrics_interval,
+        ):
+            defopt.run(funcs=funcs, argv=argv, **defopt_kwargs)
     logger.info("Finished executing successfully.")
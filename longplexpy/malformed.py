@@ -0,0 +1,72 @@
+import logging
+from collections import defaultdict
+from enum import Enum
+
+MALFORMED_COLUMN_COUNT = "wrong_column_count"
+"""A row with a different number of columns than its header."""
+
+MALFORMED_BARCODE = "unparseable_barcode"
+"""A barcode name that does not match the barcode schema, e.g. an unbarcoded "-" entry."""
+
+MALFORMED_COUNT_VALUE = "non_numeric_count"
+"""A lima.counts row whose Counts value is not a non-negative integer, e.g. NA."""
+
+MALFORMED_COUNT_HYBRID = "undesired_hybrid_count"
+"""A lima.counts row whose barcodes are from different wells."""
+
+
+class OnMalformed(Enum):
+    """How malformed rows are handled.
+
+    Attributes:
+        error: raise a ValueError on the first malformed row.
+        skip: silently drop malformed rows.
+        count: drop malformed rows and tally them per reason in a summary.
+    """
+
+    error = "error"
+    skip = "skip"
+    count = "count"
+
+
+class MalformedRows:
+    """Handles malformed rows according to an `OnMalformed` policy.
+
+    Parsers check rows without raising, then pass any malformed row to `record`, which raises
+    only when the policy is `OnMalformed.error`. When the policy is `OnMalformed.count`, malformed
+    rows are tallied per reason. Each instance keeps its own tally, so use one instance per run of
+    a tool and add its tally to a running total with `add_to` when the run finishes.
+
+    Attributes:
+        on_malformed: how malformed rows are handled.
+        counts: the number of malformed rows per reason.
+    """
+
+    def __init__(self, on_malformed: OnMalformed = OnMalformed.error) -> None:
+        self.on_malformed = on_malformed
+        self.counts: dict[str, int] = defaultdict(int)
+
+    def record(self, reason: str, message: str) -> None:
+        """Record a malformed row.
+
+        Args:
+            reason: the reason the row is malformed, used to tally malformed rows.
+            message: a description of the malformed row.
+
+        Raises:
+            ValueError if the policy is `OnMalformed.error`.
+        """
+        if self.on_malformed is OnMalformed.error:
+            raise ValueError(message)
+        elif self.on_malformed is OnMalformed.count:
+            self.counts[reason] += 1
+
+    def add_to(self, totals: dict[str, int]) -> None:
+        """Add the number of malformed rows per reason to a running total."""
+        for reason, count in self.counts.items():
+            totals[reason] = totals.get(reason, 0) + count
+
+    def log_summary(self, logger: logging.Logger) -> None:
+        """Log the number of malformed rows per reason, if any were tallied."""
+        for reason, count in sorted(self.counts.items()):
+            logger.warning(f"Skipped {count:,} malformed rows: {reason}")
@@ -27,10 +27,11 @@ WellId: TypeAlias = str
 """A type alias for the well associated with a sample within a LongPlex pool."""
 
 AdapterId: TypeAlias = str
-"""A type alias for the adapter associated with a specific barcode (P5 or P7)"""
+"""A type alias for the adapter associated with a specific barcode (e.g. P5 or P7)"""
 
 AdapterSetName: TypeAlias = str
-"""A set of AdapterIds"""
+"""A set of AdapterIds, named by joining the adapters with "+" (e.g. P5+P7). The recognized adapters
+are the i5 and i7 adapters of the barcode schema."""
 
 DEMUX_STAGE_I7_AND_I5: DemuxStage = "i7_i5"
 DEMUX_STAGE_I7_OR_I5: DemuxStage = "either_i7_i5"
@@ -38,14 +39,41 @@ DEMUX_STAGE_I7_OR_I5: DemuxStage = "either_i7_i5"
 DemuxStages: list[DemuxStage] = [DEMUX_STAGE_I7_AND_I5, DEMUX_STAGE_I7_OR_I5]
 """The recognized Lima LongPlex demultiplexing stages."""
 
-AdapterSetList: list[AdapterSetName] = ["P5+P7", "P5", "P7"]
-"""List of recognized AdapterSets"""
+LARGE_COHORT_POOLS_CONFIG_KEY: str = "longplexpy_large_cohort_pools"
+"""The MultiQC configuration key for the number of pools above which large-cohort mode is used."""
+
+DEFAULT_LARGE_COHORT_POOLS: int = 50
+"""The default number of pools above which large-cohort mode is used."""
+
+MAX_PLOT_SERIES_CONFIG_KEY: str = "longplexpy_max_plot_series"
+"""The MultiQC configuration key for the maximum number of pools shown in a large-cohort plot."""
+
+DEFAULT_MAX_PLOT_SERIES: int = 50
+"""The default maximum number of pools shown in a large-cohort plot."""
+
+EXPORT_DIR_CONFIG_KEY: str = "longplexpy_export_dir"
+"""The MultiQC configuration key for the directory where metrics tables are exported each run."""
+
+EXPORT_FORMAT_CONFIG_KEY: str = "longplexpy_export_format"
+"""The MultiQC configuration key for the format of exported metrics tables."""
+
+DEFAULT_EXPORT_FORMAT: str = "parquet"
+"""The default format of exported metrics tables."""
+
+BARCODE_SCHEMA_CONFIG_KEY: str = "longplexpy_barcode_schema"
+"""The MultiQC configuration key for the path to a TOML or YAML barcode schema."""
+
+ON_MALFORMED_CONFIG_KEY: str = "longplexpy_on_malformed"
+"""The MultiQC configuration key for how malformed lima.counts rows are handled."""
+
+DEFAULT_ON_MALFORMED: str = "error"
+"""By default, a malformed lima.counts row is an error."""
 
 
 def longplexpy_multiqc_plugin_start() -> None:
     """Setup all the configuration needed for this MultiQC plugin."""
 
-    from multiqc.utils import config  # type: ignore
+    from multiqc import config  # type: ignore
 
     config.longplexpy_version = __version__
 
@@ -59,7 +87,8 @@ def longplexpy_multiqc_plugin_start() -> None:
             {
                 "longplexpy/lima-longplex/summary": {"fn": "*.lima.summary"},
                 "longplexpy/lima-longplex/counts": {"fn": "*.lima.counts"},
+                "longplexpy/lima-longplex/stage-flow": {"fn": "*.stage_flow.txt"},
             },
         )
 
-    config.fn_clean_exts.extend([".lima", ".summary", ".csv", "_demux_report"])
+    config.fn_clean_exts.extend([".lima", ".summary", ".csv", "_demux_report", ".stage_flow"])
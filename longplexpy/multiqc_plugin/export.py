@@ -0,0 +1,80 @@
+import gzip
+import importlib.util
+import logging
+from pathlib import Path
+from typing import Any
+from typing import Mapping
+from typing import Sequence
+
+log = logging.getLogger("multiqc")
+
+EXPORT_FORMAT_PARQUET: str = "parquet"
+EXPORT_FORMAT_ARROW: str = "arrow"
+EXPORT_FORMAT_TSV: str = "tsv"
+
+ExportFormats: list[str] = [EXPORT_FORMAT_PARQUET, EXPORT_FORMAT_ARROW, EXPORT_FORMAT_TSV]
+"""The recognized formats for exported metrics tables."""
+
+ExportFormatExtensions: dict[str, str] = {
+    EXPORT_FORMAT_PARQUET: ".parquet",
+    EXPORT_FORMAT_ARROW: ".arrow",
+    EXPORT_FORMAT_TSV: ".tsv.gz",
+}
+"""The file extension of exported metrics tables in each format."""
+
+
+def resolve_export_format(export_format: str) -> str:
+    """Resolve the requested export format, falling back to TSV if pyarrow is not installed.
+
+    Raises:
+        ValueError if the export format is not recognized.
+    """
+    if export_format not in ExportFormats:
+        raise ValueError(
+            f"Unrecognized export format, {export_format}, expected one of: {ExportFormats}"
+        )
+    if export_format != EXPORT_FORMAT_TSV and importlib.util.find_spec("pyarrow") is None:
+        log.warning(f"pyarrow is not installed, exporting metrics as {EXPORT_FORMAT_TSV}.")
+        return EXPORT_FORMAT_TSV
+    return export_format
+
+
+def write_metrics_table(
+    rows: Sequence[Mapping[str, Any]],
+    columns: list[str],
+    path: Path,
+    export_format: str,
+) -> Path:
+    """Write rows of metrics as a compressed, columnar table.
+
+    Args:
+        rows: the rows of metrics, each a mapping from column name to value.
+        columns: the columns to write, in order.
+        path: the path of the table, without a file extension.
+        export_format: the format of the table, one of `ExportFormats`.
+
+    Returns:
+        The path of the table, with the file extension of the export format.
+    """
+    path = path.with_name(path.name + ExportFormatExtensions[export_format])
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if export_format == EXPORT_FORMAT_TSV:
+        with gzip.open(path, mode="wt") as out_file:
+            out_file.write("\t".join(columns) + "\n")
+            for row in rows:
+                out_file.write("\t".join(str(row[column]) for column in columns) + "\n")
+        return path
+
+    import pyarrow
+
+    table = pyarrow.table({column: [row[column] for row in rows] for column in columns})
+    if export_format == EXPORT_FORMAT_PARQUET:
+        import pyarrow.parquet
+
+        pyarrow.parquet.write_table(table, path, compression="zstd")
+    else:
+        options = pyarrow.ipc.IpcWriteOptions(compression="zstd")
+        with pyarrow.ipc.new_file(path, table.schema, options=options) as writer:
+            writer.write_table(table)
+    return path
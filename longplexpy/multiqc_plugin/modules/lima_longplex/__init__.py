@@ -1,45 +1,109 @@
 import csv
 import logging
 import re
+import uuid
 from collections import defaultdict
 from dataclasses import dataclass
+from datetime import datetime
+from datetime import timezone
 from itertools import chain
+from pathlib import Path
 from typing import Any
 from typing import Callable
 from typing import Dict
 from typing import Iterable
+from typing import Optional
 from typing import TypedDict
 
+from multiqc import config  # type: ignore
+from multiqc import report
 from multiqc.base_module import BaseMultiqcModule  # type: ignore
 from multiqc.base_module import ModuleNoSamplesFound
 from multiqc.plots import bargraph  # type: ignore
+from multiqc.plots import heatmap
 from multiqc.plots import table
 
+from longplexpy.barcodes import get_barcode_schema
+from longplexpy.barcodes import parse_barcode
+from longplexpy.barcodes import set_barcode_schema
+from longplexpy.barcodes.schema import DEFAULT_BARCODE_SCHEMA
+from longplexpy.barcodes.schema import BarcodeSchema
+from longplexpy.lima import TRANSITION_DOUBLE_ASSIGNED
+from longplexpy.lima import TRANSITION_DOUBLE_ASSIGNED_CONFLICT
+from longplexpy.lima import TRANSITION_I7_AND_I5_ONLY
+from longplexpy.lima import TRANSITION_I7_OR_I5_ONLY
+from longplexpy.malformed import MALFORMED_BARCODE
+from longplexpy.malformed import MALFORMED_COLUMN_COUNT
+from longplexpy.malformed import MALFORMED_COUNT_HYBRID
+from longplexpy.malformed import MALFORMED_COUNT_VALUE
+from longplexpy.malformed import MalformedRows
+from longplexpy.malformed import OnMalformed
+from longplexpy.multiqc_plugin import BARCODE_SCHEMA_CONFIG_KEY
+from longplexpy.multiqc_plugin import DEFAULT_EXPORT_FORMAT
+from longplexpy.multiqc_plugin import DEFAULT_LARGE_COHORT_POOLS
+from longplexpy.multiqc_plugin import DEFAULT_MAX_PLOT_SERIES
+from longplexpy.multiqc_plugin import DEFAULT_ON_MALFORMED
 from longplexpy.multiqc_plugin import DEMUX_STAGE_I7_AND_I5
 from longplexpy.multiqc_plugin import DEMUX_STAGE_I7_OR_I5
+from longplexpy.multiqc_plugin import EXPORT_DIR_CONFIG_KEY
+from longplexpy.multiqc_plugin import EXPORT_FORMAT_CONFIG_KEY
 from longplexpy.multiqc_plugin import FIND_LOG_FILES_CONTENTS_KEY as CONTENTS_KEY
 from longplexpy.multiqc_plugin import FIND_LOG_FILES_PATH_KEY as FILE_PATH_KEY
 from longplexpy.multiqc_plugin import FIND_LOG_FILES_SAMPLE_NAME_KEY as SAMPLE_NAME_KEY
+from longplexpy.multiqc_plugin import LARGE_COHORT_POOLS_CONFIG_KEY
+from longplexpy.multiqc_plugin import MAX_PLOT_SERIES_CONFIG_KEY
+from longplexpy.multiqc_plugin import ON_MALFORMED_CONFIG_KEY
 from longplexpy.multiqc_plugin import AdapterId
 from longplexpy.multiqc_plugin import AdapterSetName
 from longplexpy.multiqc_plugin import DemuxStage
 from longplexpy.multiqc_plugin import DemuxStages
 from longplexpy.multiqc_plugin import SampleId
 from longplexpy.multiqc_plugin import WellId
+from longplexpy.multiqc_plugin.export import resolve_export_format
+from longplexpy.multiqc_plugin.export import write_metrics_table
 
 log = logging.getLogger("multiqc")
 
-LONGPLEX_ADAPTER_REGEX = re.compile(r".*([A-H][0-9]{2})_(P[57])$")
-"""Regex for matching Well ID (ex. A12) and Adapter (ex. P5)"""
+STAGE_TRANSITIONS: list[str] = [
+    TRANSITION_I7_AND_I5_ONLY,
+    TRANSITION_I7_OR_I5_ONLY,
+    TRANSITION_DOUBLE_ASSIGNED,
+    TRANSITION_DOUBLE_ASSIGNED_CONFLICT,
+]
+"""The ZMW transitions between demultiplexing stages reported by `reconcile-demux-stages`"""
+
+STAGE_TRANSITION_KEYS: Dict[str, Dict[str, str]] = {
+    TRANSITION_I7_AND_I5_ONLY: {"name": "Assigned in i7_i5 only"},
+    TRANSITION_I7_OR_I5_ONLY: {"name": "Assigned in either_i7_i5 only"},
+    TRANSITION_DOUBLE_ASSIGNED: {"name": "Assigned to the same well in both"},
+    TRANSITION_DOUBLE_ASSIGNED_CONFLICT: {"name": "Assigned to different wells"},
+}
+"""Bar graph categories for each ZMW transition between demultiplexing stages"""
+
+
+def try_derive_well_and_adapter(barcode: str) -> Optional[tuple[WellId, AdapterId]]:
+    """Derive Well ID and Adapter ID from a seqWell barcode ID, or None if they are not found.
+
+    Barcode IDs are parsed with the active barcode schema (see `longplexpy.barcodes`).
+    """
+    info = parse_barcode(barcode)
+    if info is None:
+        return None
+    return (info.well, info.adapter)
+
+
+def adapter_set_name(adapters: Iterable[AdapterId]) -> AdapterSetName:
+    """The name of the set of adapters found for a well, e.g. P5+P7."""
+    return "+".join(sorted(set(adapters)))
 
 
 def derive_well_and_adapter(barcode: str) -> tuple[WellId, AdapterId]:
     """Derive Well ID and Adapter ID from a seqWell barcode ID."""
-    match = LONGPLEX_ADAPTER_REGEX.search(barcode)
-    if match is None:
+    well_and_adapter = try_derive_well_and_adapter(barcode)
+    if well_and_adapter is None:
         raise ValueError(f"Could not find Well ID and Adapter ID in {barcode}")
     else:
-        return (match.group(1), match.group(2))
+        return well_and_adapter
 
 
 class LimaSummaryMetric(TypedDict):
@@ -85,7 +149,17 @@ class LimaCountMetric:
         self.well_counts = well_counts
 
     @classmethod
-    def from_counts_text(cls, lima_counts_text: str) -> "LimaCountMetric":
+    def from_counts_text(
+        cls, lima_counts_text: str, malformed: Optional[MalformedRows] = None
+    ) -> "LimaCountMetric":
+        """Parse the contents of a *.lima.counts file.
+
+        Args:
+            lima_counts_text: the contents of the *.lima.counts file.
+            malformed: how malformed rows are handled. By default, a ValueError is raised.
+        """
+        if malformed is None:
+            malformed = MalformedRows()
         well_counts: dict = {}
         lines = lima_counts_text.splitlines()
         # Skip the second row (index 1) if it exists
@@ -94,13 +168,29 @@ class LimaCountMetric:
         for row in csv.reader(lines, delimiter="\t"):
             if len(row) == 0 or "Counts" in row:
                 continue
+            elif len(row) < 5:
+                malformed.record(MALFORMED_COLUMN_COUNT, f"Cannot parse lima.counts row, {row}")
+                continue
+            elif not row[4].isdigit():
+                malformed.record(MALFORMED_COUNT_VALUE, f"Cannot parse Counts of row, {row}")
+                continue
             else:
-                well1, adapter1 = derive_well_and_adapter(row[2])
-                well2, adapter2 = derive_well_and_adapter(row[3])
-                well_set = {well1, well2}
-                adapter_set = "+".join(sorted({adapter1, adapter2}))
-                if len(well_set) != 1:
-                    raise ValueError(f"Cannot create count metric for undesired hybrid, {row}")
+                first = try_derive_well_and_adapter(row[2])
+                second = try_derive_well_and_adapter(row[3])
+                if first is None or second is None:
+                    malformed.record(
+                        MALFORMED_BARCODE, f"Could not find Well ID and Adapter ID in {row}"
+                    )
+                    continue
+                well1, adapter1 = first
+                well2, adapter2 = second
+                adapter_set = adapter_set_name([adapter1, adapter2])
+                if well1 != well2:
+                    malformed.record(
+                        MALFORMED_COUNT_HYBRID,
+                        f"Cannot create count metric for undesired hybrid, {row}",
+                    )
+                    continue
                 well_counts.setdefault(well1, {})
                 well_counts[well1][adapter_set] = well_counts[well1].setdefault(
                     adapter_set, 0
@@ -108,6 +198,18 @@ class LimaCountMetric:
         return cls(well_counts)
 
 
+class WellBalanceMetric(TypedDict):
+    """How evenly demultiplexed ZMWs are spread across the wells of a LongPlex pool
+
+    Attributes:
+        wells_demuxed: The number of wells with at least one demultiplexed ZMW.
+        well_cv: The coefficient of variation of demultiplexed ZMWs across wells.
+    """
+
+    wells_demuxed: int
+    well_cv: float
+
+
 class LimaLongPlexMetric(TypedDict):
     """LongPlex Metrics from Lima Demultiplexing Stages"""
 
@@ -140,6 +242,7 @@ class LimaLongPlexModule(BaseMultiqcModule):
 
     summary_key: str = "longplexpy/lima-longplex/summary"
     counts_key: str = "longplexpy/lima-longplex/counts"
+    stage_flow_key: str = "longplexpy/lima-longplex/stage-flow"
     """The configuration keys for storing search patterns about Lima LongPlex outputs."""
 
     @staticmethod
@@ -241,22 +344,22 @@ class LimaLongPlexModule(BaseMultiqcModule):
         lima_summary_metrics["input_reads"] = max(
             [m["input_reads"] for m in stage_summary_data.values()]
         )
+        adapters = get_barcode_schema().adapter_roles
         lima_summary_metrics["i7_and_i5_demuxed"] = sum(
             [
-                summed_count_data.well_counts[well].get("P5+P7", 0)
-                + summed_count_data.well_counts[well].get("P7+P5", 0)
+                summed_count_data.well_counts[well].get(adapter_set_name(adapters), 0)
                 for well in summed_count_data.well_counts.keys()
             ]
         )
         lima_summary_metrics["i7_demuxed"] = sum(
             [
-                summed_count_data.well_counts[well].get("P7", 0)
+                summed_count_data.well_counts[well].get(adapters.i7, 0)
                 for well in summed_count_data.well_counts.keys()
             ]
         )
         lima_summary_metrics["i5_demuxed"] = sum(
             [
-                summed_count_data.well_counts[well].get("P5", 0)
+                summed_count_data.well_counts[well].get(adapters.i5, 0)
                 for well in summed_count_data.well_counts.keys()
             ]
         )
@@ -278,6 +381,15 @@ class LimaLongPlexModule(BaseMultiqcModule):
         )
         return lima_summary_metrics
 
+    @staticmethod
+    def parse_stage_flow_contents(contents: str) -> dict[WellId, dict[str, int]]:
+        """Parse the per-well flow counts written by `reconcile-demux-stages`."""
+        stage_flow: dict[WellId, dict[str, int]] = {}
+        for row in csv.DictReader(contents.splitlines(), delimiter="\t"):
+            well = row.pop("well")
+            stage_flow[well] = {transition: int(count) for transition, count in row.items()}
+        return stage_flow
+
     @staticmethod
     def derive_demux_stage(file_path: str) -> DemuxStage:
         """Derive the DemuxStage from the the path to the Lima LongPlex output file."""
@@ -291,6 +403,256 @@ class LimaLongPlexModule(BaseMultiqcModule):
         """Strip seqWell prefixes from sample id"""
         return re.sub(r"^i7_i5_|^i7_5_", "", sample_id)
 
+    @staticmethod
+    def summarize_well_balance(well_totals: dict[WellId, int]) -> WellBalanceMetric:
+        """Summarize how evenly demultiplexed ZMWs are spread across the wells of a pool."""
+        counts = list(well_totals.values())
+        wells_demuxed = sum(1 for count in counts if count > 0)
+        mean = sum(counts) / len(counts) if len(counts) > 0 else 0.0
+        if mean == 0:
+            return {"wells_demuxed": wells_demuxed, "well_cv": 0.0}
+        variance = sum((count - mean) ** 2 for count in counts) / len(counts)
+        return {"wells_demuxed": wells_demuxed, "well_cv": variance**0.5 / mean}
+
+    def write_tsv_data_file(
+        self, header: list[str], rows: Iterable[Iterable[Any]], fn: str
+    ) -> None:
+        """Write rows to a tab-separated file in the MultiQC data directory.
+
+        `BaseMultiqcModule.write_data_file` does nothing while modules are running, as the data
+        directory is only configured afterwards. Files written to the temporary data directory are
+        moved into place along with the rest of the MultiQC data.
+        """
+        if not config.make_data_dir:
+            return
+        with open(Path(report.data_tmp_dir()) / f"{fn}.txt", mode="w") as out_file:
+            out_file.write("\t".join(header) + "\n")
+            for row in rows:
+                out_file.write("\t".join(str(value) for value in row) + "\n")
+
+    def export_metrics(
+        self,
+        longplex_summary_metrics: dict[SampleId, LimaLongPlexMetric],
+        summed_count_metrics: dict[SampleId, LimaCountMetric],
+    ) -> None:
+        """Export summary and per-well metrics as compressed, columnar tables.
+
+        Each run writes one summary table and one per-well table, named by a unique run ID, to the
+        `summary` and `well_counts` subdirectories of the configured export directory. Every row
+        carries the run ID, so the tables of many runs can be loaded together as a single dataset.
+        Without a configured export directory, tables are written to the MultiQC data directory.
+        """
+        export_dir: Optional[str] = getattr(config, EXPORT_DIR_CONFIG_KEY, None)
+        if export_dir is not None:
+            directory = Path(export_dir)
+        elif config.make_data_dir:
+            directory = Path(report.data_tmp_dir()) / "multiqc_longplexpy_metrics"
+        else:
+            return
+
+        export_format = resolve_export_format(
+            getattr(config, EXPORT_FORMAT_CONFIG_KEY, DEFAULT_EXPORT_FORMAT)
+        )
+        run_time = datetime.now(timezone.utc)
+        run_id = f"{run_time:%Y%m%dT%H%M%SZ}_{uuid.uuid4().hex[:8]}"
+
+        summary_columns = ["run_id", "run_time", "sample", *LimaLongPlexMetric.__annotations__]
+        summary_rows = [
+            {"run_id": run_id, "run_time": run_time.isoformat(), "sample": sample, **metrics}
+            for sample, metrics in sorted(longplex_summary_metrics.items())
+        ]
+        write_metrics_table(
+            rows=summary_rows,
+            columns=summary_columns,
+            path=directory / "summary" / run_id,
+            export_format=export_format,
+        )
+
+        well_columns = ["run_id", "sample", "well", "adapter_set", "count"]
+        well_rows = [
+            {
+                "run_id": run_id,
+                "sample": sample,
+                "well": well,
+                "adapter_set": adapter_set,
+                "count": count,
+            }
+            for sample, metric in sorted(summed_count_metrics.items())
+            for well, adapter_counts in sorted(metric.well_counts.items())
+            for adapter_set, count in sorted(adapter_counts.items())
+        ]
+        write_metrics_table(
+            rows=well_rows,
+            columns=well_columns,
+            path=directory / "well_counts" / run_id,
+            export_format=export_format,
+        )
+
+    def add_large_cohort_sections(
+        self, summed_count_metrics: dict[SampleId, LimaCountMetric]
+    ) -> None:
+        """Add compact per-well summaries for cohorts with too many pools to plot every well.
+
+        Pools are summarized by how evenly their ZMWs are spread across wells, and only the least
+        balanced pools (up to the configured maximum number of plot series) are shown per well.
+        Full per-well counts for every pool are in the `multiqc_longplexpy_well_counts` data file.
+        """
+        max_plot_series: int = getattr(config, MAX_PLOT_SERIES_CONFIG_KEY, DEFAULT_MAX_PLOT_SERIES)
+
+        well_totals: dict[SampleId, dict[WellId, int]] = {
+            pool: {well: sum(counts.values()) for well, counts in metric.well_counts.items()}
+            for pool, metric in summed_count_metrics.items()
+        }
+        well_balance: dict[SampleId, WellBalanceMetric] = {
+            pool: self.summarize_well_balance(totals) for pool, totals in well_totals.items()
+        }
+
+        self.add_section(
+            name="Lima LongPlex Well Balance",
+            anchor="lima-longplex-well-balance",
+            description=(
+                "How evenly demultiplexed ZMWs are spread across the wells of each pool. "
+                "Per-well counts for every pool are written to the MultiQC data directory."
+            ),
+            plot=table.plot(
+                data=well_balance,
+                headers={
+                    "wells_demuxed": {
+                        "title": "Wells Demuxed",
+                        "description": "The number of wells with at least one demuxed ZMW.",
+                        "min": 0,
+                        "format": "{:.0f}",
+                        "scale": "blue",
+                    },
+                    "well_cv": {
+                        "title": "Well CV",
+                        "description": "The coefficient of variation of ZMWs across wells.",
+                        "min": 0,
+                        "format": "{:.2f}",
+                        "scale": "RdYlGn-rev",
+                    },
+                },
+                pconfig={
+                    "namespace": self.name,
+                    "id": "lima_longplex_well_balance_table",
+                    "title": "Lima LongPlex: Well Balance",
+                },
+            ),
+        )
+
+        shown_pools = sorted(well_balance, key=lambda pool: -well_balance[pool]["well_cv"])[
+            :max_plot_series
+        ]
+        wells = sorted(set(chain(*[well_totals[pool].keys() for pool in shown_pools])))
+        relative_yields = []
+        for pool in shown_pools:
+            expected = sum(well_totals[pool].values()) / len(wells)
+            relative_yields.append(
+                [
+                    well_totals[pool].get(well, 0) / expected if expected > 0 else 0.0
+                    for well in wells
+                ]
+            )
+
+        self.add_section(
+            description=(
+                f"ZMWs per well relative to an even split across wells, for the {len(shown_pools)}"
+                f" of {len(well_totals)} pools with the least even split across wells."
+            ),
+            plot=heatmap.plot(
+                data=relative_yields,
+                xcats=wells,
+                ycats=shown_pools,
+                pconfig={
+                    "id": "lima_longplex_well_relative_yield",
+                    "title": "Lima LongPlex: Relative Yield by Well",
+                    "xlab": "Well",
+                    "ylab": "Pool",
+                    "min": 0,
+                    "square": False,
+                    "xcats_samples": False,
+                },
+            ),
+        )
+
+    def add_stage_flow_sections(
+        self,
+        stage_flow_metrics: dict[SampleId, dict[WellId, dict[str, int]]],
+        per_well: bool,
+    ) -> None:
+        """Add sections for the ZMW transitions between demultiplexing stages.
+
+        Transitions are always shown per pool. When `per_well` is True, they are also shown per
+        well, with one plot per pool. Per-well transitions for every pool are always written to
+        the `multiqc_longplexpy_stage_flow_by_well` data file.
+        """
+        samples = sorted(stage_flow_metrics)
+        stage_flow_totals = {
+            sample: {
+                transition: sum(counts.get(transition, 0) for counts in flow.values())
+                for transition in STAGE_TRANSITIONS
+            }
+            for sample, flow in stage_flow_metrics.items()
+        }
+
+        self.write_tsv_data_file(
+            header=["Sample", *STAGE_TRANSITIONS],
+            rows=(
+                (
+                    sample,
+                    *[stage_flow_totals[sample][transition] for transition in STAGE_TRANSITIONS],
+                )
+                for sample in samples
+            ),
+            fn="multiqc_longplexpy_stage_flow",
+        )
+        self.write_tsv_data_file(
+            header=["Sample", "well", *STAGE_TRANSITIONS],
+            rows=(
+                (sample, well, *[counts.get(transition, 0) for transition in STAGE_TRANSITIONS])
+                for sample in samples
+                for well, counts in sorted(stage_flow_metrics[sample].items())
+            ),
+            fn="multiqc_longplexpy_stage_flow_by_well",
+        )
+
+        self.add_section(
+            name="Lima LongPlex Stage Transitions",
+            anchor="lima-longplex-stage-transitions",
+            description=(
+                "ZMWs by the demultiplexing stage(s) that assigned them. "
+                "ZMWs assigned in both stages indicate double-assigned reads."
+            ),
+            plot=bargraph.plot(
+                data=stage_flow_totals,
+                cats=STAGE_TRANSITION_KEYS,
+                pconfig={
+                    "namespace": self.name,
+                    "id": "lima_longplex_stage_transitions",
+                    "title": "Lima LongPlex: ZMW Transitions Between Stages",
+                    "cpswitch": True,
+                    "ylab": "ZMWs",
+                },
+            ),
+        )
+
+        if per_well:
+            self.add_section(
+                description="ZMW transitions between demultiplexing stages by well.",
+                plot=bargraph.plot(
+                    data=[stage_flow_metrics[sample] for sample in samples],
+                    cats=STAGE_TRANSITION_KEYS,
+                    pconfig={
+                        "namespace": self.name,
+                        "id": "lima_longplex_well_stage_transitions",
+                        "title": "Lima LongPlex: ZMW Transitions Between Stages by Well",
+                        "cpswitch": True,
+                        "ylab": "ZMWs",
+                        "data_labels": samples,
+                    },
+                ),
+            )
+
     def __init__(self) -> None:
         """Initialize the MultiQC Lima LongPlex module."""
         super(LimaLongPlexModule, self).__init__(
@@ -312,14 +674,32 @@ class LimaLongPlexModule(BaseMultiqcModule):
             summary_parsed = self.parse_summary_contents(file[CONTENTS_KEY])
             lima_summary_metrics[summary_sample_id][summary_demux_stage] = summary_parsed
 
+        barcode_schema: Optional[str] = getattr(config, BARCODE_SCHEMA_CONFIG_KEY, None)
+        set_barcode_schema(
+            DEFAULT_BARCODE_SCHEMA
+            if barcode_schema is None
+            else BarcodeSchema.from_file(Path(barcode_schema))
+        )
+
+        malformed = MalformedRows(
+            OnMalformed(getattr(config, ON_MALFORMED_CONFIG_KEY, DEFAULT_ON_MALFORMED))
+        )
         for file in self.find_log_files(self.counts_key):
             count_sample_id: SampleId = self.derive_sample_id(file[SAMPLE_NAME_KEY])
             count_demux_stage: DemuxStage = self.derive_demux_stage(file[FILE_PATH_KEY])
-            counts_parsed = LimaCountMetric.from_counts_text(file[CONTENTS_KEY])
+            counts_parsed = LimaCountMetric.from_counts_text(file[CONTENTS_KEY], malformed)
             lima_count_metrics[count_sample_id][count_demux_stage] = counts_parsed
 
+        stage_flow_metrics: dict[SampleId, dict[WellId, dict[str, int]]] = {}
+        for file in self.find_log_files(self.stage_flow_key):
+            flow_sample_id: SampleId = self.derive_sample_id(file[SAMPLE_NAME_KEY])
+            stage_flow_metrics[flow_sample_id] = self.parse_stage_flow_contents(file[CONTENTS_KEY])
+
+        malformed.log_summary(log)
+
         lima_summary_metrics = self.ignore_samples(data=lima_summary_metrics)
         lima_count_metrics = self.ignore_samples(data=lima_count_metrics)
+        stage_flow_metrics = self.ignore_samples(data=stage_flow_metrics)
 
         if len(lima_summary_metrics) == 0 or len(lima_count_metrics) == 0:
             raise ModuleNoSamplesFound
@@ -339,8 +719,15 @@ class LimaLongPlexModule(BaseMultiqcModule):
             for sample in lima_summary_metrics.keys()
         }
 
-        # This doesn't seem to actually write anything
-        self.write_data_file(data=longplex_summary_metrics, fn="multiqc_longplexpy_limalongplex")
+        self.write_tsv_data_file(
+            header=["Sample", *LimaLongPlexMetric.__annotations__],
+            rows=(
+                (sample, *[metrics[key] for key in LimaLongPlexMetric.__annotations__])  # type: ignore
+                for sample, metrics in sorted(longplex_summary_metrics.items())
+            ),
+            fn="multiqc_longplexpy_limalongplex",
+        )
+        self.export_metrics(longplex_summary_metrics, summed_count_metrics)
 
         # General Statistics ###########################################################
 
@@ -469,27 +856,51 @@ class LimaLongPlexModule(BaseMultiqcModule):
             plot=bargraph.plot(data=longplex_summary_metrics, cats=keys, pconfig=bargraph_config),
         )
 
-        # Per-pool Bar Plots #############################################################
+        # Per-pool Plots ###############################################################
         pools = list(summed_count_metrics.keys())
-        per_pool_pconfig = {
-            "namespace": self.name,
-            "id": "lima_longplex_well_demux_fractions",
-            "title": "Lima LongPlex: Demultiplexing Summary by Well",
-            "cpswitch": True,
-            "ylab": "ZMWs",
-            "data_labels": pools,
-        }
 
-        well_data = [summed_count_metrics[pool].well_counts for pool in pools]
-
-        well_keys: Dict[str, Dict[str, str]] = {
-            "P7+P5": {"name": "ZMWs with i5 and i7"},
-            "P5+P7": {"name": "ZMWs with i5 and i7"},
-            "P7": {"name": "ZMWs with i7"},
-            "P5": {"name": "ZMWs with i5"},
-        }
+        self.write_tsv_data_file(
+            header=["Sample", "well", "adapter_set", "count"],
+            rows=(
+                (pool, well, adapter_set, count)
+                for pool in pools
+                for well, adapter_counts in sorted(summed_count_metrics[pool].well_counts.items())
+                for adapter_set, count in sorted(adapter_counts.items())
+            ),
+            fn="multiqc_longplexpy_well_counts",
+        )
 
-        self.add_section(
-            description="LongPlex Demultiplexing by Well",
-            plot=bargraph.plot(data=well_data, cats=well_keys, pconfig=per_pool_pconfig),
+        large_cohort_pools: int = getattr(
+            config, LARGE_COHORT_POOLS_CONFIG_KEY, DEFAULT_LARGE_COHORT_POOLS
         )
+        if len(pools) > large_cohort_pools:
+            self.add_large_cohort_sections(summed_count_metrics)
+        else:
+            per_pool_pconfig = {
+                "namespace": self.name,
+                "id": "lima_longplex_well_demux_fractions",
+                "title": "Lima LongPlex: Demultiplexing Summary by Well",
+                "cpswitch": True,
+                "ylab": "ZMWs",
+                "data_labels": pools,
+            }
+
+            well_data = [summed_count_metrics[pool].well_counts for pool in pools]
+
+            adapters = get_barcode_schema().adapter_roles
+            well_keys: Dict[str, Dict[str, str]] = {
+                adapter_set_name(adapters): {"name": "ZMWs with i5 and i7"},
+                adapters.i7: {"name": "ZMWs with i7"},
+                adapters.i5: {"name": "ZMWs with i5"},
+            }
+
+            self.add_section(
+                description="LongPlex Demultiplexing by Well",
+                plot=bargraph.plot(data=well_data, cats=well_keys, pconfig=per_pool_pconfig),
+            )
+
+        # Stage Transitions (Optional) ###################################################
+        if len(stage_flow_metrics) > 0:
+            self.add_stage_flow_sections(
+                stage_flow_metrics, per_well=len(pools) <= large_cohort_pools
+            )
@@ -0,0 +1,162 @@
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from types import TracebackType
+from typing import Optional
+from typing import Type
+
+METRIC_PREFIX = "longplexpy"
+"""The prefix of every exported metric name."""
+
+
+def _escape_label_value(value: str) -> str:
+    """Escape a label value for the Prometheus text exposition format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def peak_memory_bytes() -> int:
+    """The peak resident set size of this process, in bytes, or 0 if it cannot be determined."""
+    try:
+        import resource
+    except ImportError:
+        return 0
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class RunMetrics:
+    """Counters and gauges for a single longplexpy run.
+
+    Tools increment the counters of `RUN_METRICS` as they work. When the entry point is asked to
+    export metrics, they are written in the Prometheus textfile collector format at the end of the
+    run and periodically while it runs.
+
+    Attributes:
+        tool: the name of the tool being run, used as the `tool` label.
+        sample: the name of the sample being processed, used as the `sample` label.
+        rows_classified: the number of lima.report rows (or ZMWs) classified.
+        hybrids_found: the number of undesired hybrids found.
+        bytes_in: the number of bytes read.
+        bytes_out: the number of bytes written.
+        malformed_rows: the number of malformed rows skipped, per reason.
+        succeeded: True if the run finished successfully.
+    """
+
+    def __init__(self, tool: str = "", sample: str = "") -> None:
+        self.tool = tool
+        self.sample = sample
+        self.rows_classified: int = 0
+        self.hybrids_found: int = 0
+        self.bytes_in: int = 0
+        self.bytes_out: int = 0
+        self.malformed_rows: dict[str, int] = {}
+        self.succeeded: bool = False
+        self.start_time: float = time.time()
+        self.end_time: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        """True until the run has finished, successfully or not."""
+        return self.end_time is None
+
+    def render(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        now = time.time() if self.end_time is None else self.end_time
+        duration = now - self.start_time
+        labels = (
+            f'{{tool="{_escape_label_value(self.tool)}",'
+            f'sample="{_escape_label_value(self.sample)}"}}'
+        )
+        metrics: list[tuple[str, str, str, float]] = [
+            ("rows_classified_total", "counter", "Rows classified.", self.rows_classified),
+            ("hybrids_found_total", "counter", "Undesired hybrids found.", self.hybrids_found),
+            ("input_bytes_total", "counter", "Bytes read.", self.bytes_in),
+            ("output_bytes_total", "counter", "Bytes written.", self.bytes_out),
+            (
+                "rows_per_second",
+                "gauge",
+                "Rows classified per second of the run.",
+                self.rows_classified / duration if duration > 0 else 0.0,
+            ),
+            ("duration_seconds", "gauge", "Time since the run started.", duration),
+            ("peak_memory_bytes", "gauge", "Peak resident set size.", peak_memory_bytes()),
+            ("running", "gauge", "1 while the run is in progress.", int(self.running)),
+            ("success", "gauge", "1 if the run finished successfully.", int(self.succeeded)),
+            ("last_update_timestamp_seconds", "gauge", "Time these metrics were written.", now),
+        ]
+        lines: list[str] = []
+        for name, metric_type, description, value in metrics:
+            full_name = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# HELP {full_name} {description}")
+            lines.append(f"# TYPE {full_name} {metric_type}")
+            lines.append(f"{full_name}{labels} {value}")
+        if len(self.malformed_rows) > 0:
+            full_name = f"{METRIC_PREFIX}_malformed_rows_total"
+            lines.append(f"# HELP {full_name} Malformed rows skipped, by reason.")
+            lines.append(f"# TYPE {full_name} counter")
+            for reason, count in sorted(self.malformed_rows.items()):
+                reason_labels = f'{labels[:-1]},reason="{_escape_label_value(reason)}"}}'
+                lines.append(f"{full_name}{reason_labels} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path) -> None:
+        """Atomically write the metrics to a textfile, so a collector never reads a partial file."""
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, mode="w") as out_file:
+            out_file.write(self.render())
+        os.replace(tmp_path, path)
+
+
+RUN_METRICS: RunMetrics = RunMetrics()
+"""The metrics of the current run, incremented by tools as they work."""
+
+
+class RunMetricsReporter:
+    """Periodically write `RUN_METRICS` to a Prometheus textfile while a run is in progress.
+
+    On exit, the end of the run (and whether it succeeded) is recorded and the metrics are written
+    a final time.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        tool: str,
+        sample: str = "",
+        interval: float = 15.0,
+        metrics: RunMetrics = RUN_METRICS,
+    ) -> None:
+        self.path = path
+        self.interval = interval
+        self.metrics = metrics
+        self.metrics.tool = tool
+        self.metrics.sample = sample
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._write_periodically, daemon=True)
+
+    def _write_periodically(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.metrics.write(self.path)
+
+    def __enter__(self) -> "RunMetricsReporter":
+        self.metrics.start_time = time.time()
+        self.metrics.write(self.path)
+        self._thread.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self._stopped.set()
+        self._thread.join()
+        self.metrics.succeeded = exc_type is None or (
+            isinstance(exc_value, SystemExit) and exc_value.code in (0, None)
+        )
+        self.metrics.end_time = time.time()
+        self.metrics.write(self.path)
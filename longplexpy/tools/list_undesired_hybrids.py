@@ -1,8 +1,14 @@
+import logging
 from pathlib import Path
-from typing import Iterator
 
 from longplexpy.lima import HYBRID_STATUS
-from longplexpy.lima import LimaReportMetric
+from longplexpy.lima import classify_barcodes
+from longplexpy.lima import iter_lima_report_rows
+from longplexpy.lima import read_lima_report_header
+from longplexpy.malformed import MALFORMED_BARCODE
+from longplexpy.malformed import MalformedRows
+from longplexpy.malformed import OnMalformed
+from longplexpy.prometheus import RUN_METRICS
 
 
 def list_undesired_hybrids(
@@ -10,6 +16,7 @@ def list_undesired_hybrids(
     lima_report: Path,
     output: Path,
     read_name_suffix: str = "/ccs",
+    on_malformed: OnMalformed = OnMalformed.error,
 ) -> None:
     """List undesired hybrids in lima.report file
 
@@ -20,10 +27,32 @@ def list_undesired_hybrids(
             Lima may remove read suffixes to generate ZMW names.
             This parameter can be used to reconstruct read names as they appear in the input BAM.
             Default = "/ccs"
+        on_malformed: how rows with the wrong number of columns or unexpected barcode names are
+            handled: raise an error, skip them, or skip them and log a count per reason.
     """
+    logger = logging.getLogger(__name__)
+    malformed = MalformedRows(on_malformed)
+
+    header = read_lima_report_header(lima_report)
+    zmw_index = header.index("ZMW")
+    lowest_index = header.index("IdxLowestNamed")
+    highest_index = header.index("IdxHighestNamed")
 
     with open(output, mode="w") as out_file:
-        report_reader: Iterator[LimaReportMetric] = LimaReportMetric.read(lima_report)
-        for report_row in report_reader:
-            if report_row.status == HYBRID_STATUS:
-                out_file.write(f"{report_row.ZMW}{read_name_suffix}\n")
+        for fields in iter_lima_report_rows(lima_report, malformed):
+            status = classify_barcodes(fields[lowest_index], fields[highest_index])
+            if status is None:
+                malformed.record(
+                    MALFORMED_BARCODE,
+                    f"Barcodes of ZMW {fields[zmw_index]} do not match the barcode schema",
+                )
+                continue
+            RUN_METRICS.rows_classified += 1
+            if status == HYBRID_STATUS:
+                read_name = f"{fields[zmw_index]}{read_name_suffix}\n"
+                out_file.write(read_name)
+                RUN_METRICS.hybrids_found += 1
+                RUN_METRICS.bytes_out += len(read_name.encode())
+
+    malformed.log_summary(logger)
+    malformed.add_to(RUN_METRICS.malformed_rows)
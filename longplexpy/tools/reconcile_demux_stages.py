@@ -0,0 +1,175 @@
+import logging
+from collections import defaultdict
+from pathlib import Path
+from typing import Iterator
+from typing import Optional
+
+from longplexpy.lima import HYBRID_STATUS
+from longplexpy.lima import TRANSITION_DOUBLE_ASSIGNED
+from longplexpy.lima import TRANSITION_DOUBLE_ASSIGNED_CONFLICT
+from longplexpy.lima import TRANSITION_I7_AND_I5_ONLY
+from longplexpy.lima import TRANSITION_I7_OR_I5_ONLY
+from longplexpy.lima import TRANSITION_UNASSIGNED
+from longplexpy.lima import UNASSIGNED_STATE
+from longplexpy.lima import classify_barcodes
+from longplexpy.lima import iter_lima_report_rows
+from longplexpy.lima import read_lima_report_header
+from longplexpy.lima import zmw_sort_key
+from longplexpy.malformed import MALFORMED_BARCODE
+from longplexpy.malformed import MalformedRows
+from longplexpy.malformed import OnMalformed
+from longplexpy.prometheus import RUN_METRICS
+
+ZMW_TRANSITIONS_SUFFIX = ".zmw_transitions.txt"
+"""The suffix of the per-ZMW transition table."""
+
+STAGE_FLOW_SUFFIX = ".stage_flow.txt"
+"""The suffix of the per-well flow counts, as discovered by the MultiQC module."""
+
+_UNASSIGNED_STATES = {UNASSIGNED_STATE, HYBRID_STATUS}
+
+StageRow = tuple[tuple[str, int, str], str, str]
+"""A ZMW's sort key, name and state within a single demultiplexing stage."""
+
+
+def _iter_stage_states(lima_report: Path, malformed: MalformedRows) -> Iterator[StageRow]:
+    """Stream the state of every ZMW in a lima.report, checking that ZMWs are sorted.
+
+    If the report has a PassedFilters column, ZMWs which did not pass are unassigned. Rows with
+    malformed barcode names are handled by `malformed`.
+
+    Raises:
+        ValueError if the ZMWs are not sorted by movie and hole number, or a ZMW is repeated.
+    """
+    header = read_lima_report_header(lima_report)
+    zmw_index = header.index("ZMW")
+    lowest_index = header.index("IdxLowestNamed")
+    highest_index = header.index("IdxHighestNamed")
+    passed_index = header.index("PassedFilters") if "PassedFilters" in header else None
+
+    previous_key: Optional[tuple[str, int, str]] = None
+    for fields in iter_lima_report_rows(lima_report, malformed):
+        zmw = fields[zmw_index]
+        if passed_index is not None and fields[passed_index] == "0":
+            state: Optional[str] = UNASSIGNED_STATE
+        else:
+            state = classify_barcodes(fields[lowest_index], fields[highest_index])
+            if state is None:
+                malformed.record(
+                    MALFORMED_BARCODE,
+                    f"Barcodes of ZMW {zmw} in {lima_report} do not match the barcode schema",
+                )
+                continue
+
+        key = zmw_sort_key(zmw)
+        if previous_key is not None and key <= previous_key:
+            raise ValueError(
+                f"ZMWs in {lima_report} are not sorted by movie and hole number,"
+                f" or are repeated, at ZMW {zmw}"
+            )
+        previous_key = key
+        yield key, zmw, state
+
+
+def _transition(i7_i5_state: str, either_i7_i5_state: str) -> str:
+    """Classify how a ZMW moved between the i7_i5 and either_i7_i5 stages."""
+    i7_i5_assigned = i7_i5_state not in _UNASSIGNED_STATES
+    either_i7_i5_assigned = either_i7_i5_state not in _UNASSIGNED_STATES
+    if i7_i5_assigned and either_i7_i5_assigned:
+        if i7_i5_state == either_i7_i5_state:
+            return TRANSITION_DOUBLE_ASSIGNED
+        return TRANSITION_DOUBLE_ASSIGNED_CONFLICT
+    elif i7_i5_assigned:
+        return TRANSITION_I7_AND_I5_ONLY
+    elif either_i7_i5_assigned:
+        return TRANSITION_I7_OR_I5_ONLY
+    return TRANSITION_UNASSIGNED
+
+
+def reconcile_demux_stages(
+    *,
+    i7_i5_report: Path,
+    either_i7_i5_report: Path,
+    output_prefix: Path,
+    on_malformed: OnMalformed = OnMalformed.error,
+) -> None:
+    """Reconcile ZMW assignments between the i7_i5 and either_i7_i5 demultiplexing stages
+
+    Both lima.report files are streamed as a merge-join on ZMW, so memory use does not grow with
+    the number of ZMWs. Both reports must be sorted by movie and then hole number, as they are
+    when written by Lima.
+
+    A table of each ZMW's state in both stages is written to [output_prefix].zmw_transitions.txt
+    and per-well counts of ZMWs for each transition are written to [output_prefix].stage_flow.txt.
+
+    Args:
+        i7_i5_report: the lima.report file from the i7_i5 demultiplexing stage.
+        either_i7_i5_report: the lima.report file from the either_i7_i5 demultiplexing stage.
+        output_prefix: the path prefix of the output files.
+        on_malformed: how rows with the wrong number of columns or unexpected barcode names are
+            handled: raise an error, skip them (treating the ZMW as absent from that stage), or
+            skip them and log a count per reason.
+    """
+    from longplexpy.lima import StageFlowMetric
+    from longplexpy.lima import ZmwTransitionMetric
+
+    logger = logging.getLogger(__name__)
+    malformed = MalformedRows(on_malformed)
+
+    flow_counts: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    transition_counts: dict[str, int] = defaultdict(int)
+
+    i7_i5_rows = _iter_stage_states(i7_i5_report, malformed)
+    either_i7_i5_rows = _iter_stage_states(either_i7_i5_report, malformed)
+    i7_i5_row = next(i7_i5_rows, None)
+    either_i7_i5_row = next(either_i7_i5_rows, None)
+
+    with open(Path(f"{output_prefix}{ZMW_TRANSITIONS_SUFFIX}"), mode="w") as out_file:
+        header = "\t".join(ZmwTransitionMetric.header()) + "\n"
+        out_file.write(header)
+        RUN_METRICS.bytes_out += len(header.encode())
+        while i7_i5_row is not None or either_i7_i5_row is not None:
+            if either_i7_i5_row is None or (
+                i7_i5_row is not None and i7_i5_row[0] < either_i7_i5_row[0]
+            ):
+                _, zmw, i7_i5_state = i7_i5_row
+                either_i7_i5_state = UNASSIGNED_STATE
+                i7_i5_row = next(i7_i5_rows, None)
+            elif i7_i5_row is None or either_i7_i5_row[0] < i7_i5_row[0]:
+                _, zmw, either_i7_i5_state = either_i7_i5_row
+                i7_i5_state = UNASSIGNED_STATE
+                either_i7_i5_row = next(either_i7_i5_rows, None)
+            else:
+                _, zmw, i7_i5_state = i7_i5_row
+                either_i7_i5_state = either_i7_i5_row[2]
+                i7_i5_row = next(i7_i5_rows, None)
+                either_i7_i5_row = next(either_i7_i5_rows, None)
+
+            transition = _transition(i7_i5_state, either_i7_i5_state)
+            transition_counts[transition] += 1
+            RUN_METRICS.rows_classified += 1
+            if HYBRID_STATUS in (i7_i5_state, either_i7_i5_state):
+                RUN_METRICS.hybrids_found += 1
+            if transition == TRANSITION_I7_OR_I5_ONLY:
+                flow_counts[either_i7_i5_state][transition] += 1
+            elif transition != TRANSITION_UNASSIGNED:
+                flow_counts[i7_i5_state][transition] += 1
+            row = f"{zmw}\t{i7_i5_state}\t{either_i7_i5_state}\t{transition}\n"
+            out_file.write(row)
+            RUN_METRICS.bytes_out += len(row.encode())
+
+    stage_flow_path = Path(f"{output_prefix}{STAGE_FLOW_SUFFIX}")
+    StageFlowMetric.write(
+        stage_flow_path,
+        *[StageFlowMetric(well=well, **flow_counts[well]) for well in sorted(flow_counts)],
+    )
+    RUN_METRICS.bytes_out += stage_flow_path.stat().st_size
+
+    double_assigned = (
+        transition_counts[TRANSITION_DOUBLE_ASSIGNED]
+        + transition_counts[TRANSITION_DOUBLE_ASSIGNED_CONFLICT]
+    )
+    malformed.log_summary(logger)
+    malformed.add_to(RUN_METRICS.malformed_rows)
+    if double_assigned > 0:
+        logger.warning(f"Found {double_assigned:,} ZMWs assigned in both demultiplexing stages.")
@@ -0,0 +1,216 @@
+import logging
+import sys
+from collections import OrderedDict
+from enum import Enum
+from pathlib import Path
+from types import TracebackType
+from typing import Callable
+from typing import Optional
+from typing import TextIO
+from typing import Type
+
+from longplexpy.barcodes import try_barcode_set_from_barcode
+from longplexpy.lima import HYBRID_STATUS
+from longplexpy.lima import classify_barcodes
+from longplexpy.lima import iter_lima_report_rows
+from longplexpy.lima import read_lima_report_header
+from longplexpy.malformed import MALFORMED_BARCODE
+from longplexpy.malformed import MalformedRows
+from longplexpy.malformed import OnMalformed
+from longplexpy.prometheus import RUN_METRICS
+
+SHARD_SUFFIX = ".lima.report"
+"""The suffix of every shard file, so shards can be read with LimaReportMetric.read."""
+
+OPEN_FILES_HEADROOM = 64
+"""The number of file descriptors left free for the process when choosing how many shards to
+hold open at once."""
+
+FALLBACK_MAX_OPEN_FILES = 128
+"""The maximum number of shards held open at once where the open file limit cannot be read."""
+
+
+def default_max_open_files() -> int:
+    """The default maximum number of shard files held open at once.
+
+    This is the soft limit on open files for the process, less `OPEN_FILES_HEADROOM`, so that every
+    well of a 384-well plate can usually be held open and each row is a buffered write rather than
+    a re-open of an evicted shard.
+    """
+    try:
+        import resource
+    except ImportError:  # the resource module is not available on Windows
+        return FALLBACK_MAX_OPEN_FILES
+    soft_limit, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft_limit == resource.RLIM_INFINITY:
+        return sys.maxsize
+    return max(1, soft_limit - OPEN_FILES_HEADROOM)
+
+
+class ShardBy(Enum):
+    """The field of a lima.report row used to route it to a shard.
+
+    Attributes:
+        well: the well of the row's barcodes. Undesired hybrids are routed to their own shard.
+        barcode_set: the barcode set of the row's lowest named barcode.
+        movie: the movie name, i.e. the first element of the ZMW name.
+    """
+
+    well = "well"
+    barcode_set = "barcode_set"
+    movie = "movie"
+
+
+class ShardWriterPool:
+    """An LRU-bounded pool of open, buffered shard file handles.
+
+    At most `max_open_files` handles are kept open at once, by default as many as the open file
+    limit allows (see `default_max_open_files`). When a new shard is requested and the pool is full,
+    the least recently used handle is flushed and closed. A shard that is re-opened after being
+    evicted is appended to, so its header is only ever written once.
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        header: str,
+        max_open_files: Optional[int] = None,
+        buffer_size: int = 1 << 20,
+    ) -> None:
+        if max_open_files is None:
+            max_open_files = default_max_open_files()
+        if max_open_files < 1:
+            raise ValueError(f"max_open_files must be at least 1, found {max_open_files}")
+        self.output_dir = output_dir
+        self.header = header
+        self.max_open_files = max_open_files
+        self.buffer_size = buffer_size
+        self._handles: OrderedDict[str, TextIO] = OrderedDict()
+        self._paths: dict[str, Path] = {}
+
+    @property
+    def paths(self) -> dict[str, Path]:
+        """The path of every shard written so far, keyed by shard name."""
+        return dict(self._paths)
+
+    def get(self, shard: str) -> TextIO:
+        """Get an open handle for a shard, opening (or re-opening) it if needed."""
+        handle = self._handles.get(shard)
+        if handle is not None:
+            self._handles.move_to_end(shard)
+            return handle
+
+        if len(self._handles) >= self.max_open_files:
+            _, evicted = self._handles.popitem(last=False)
+            evicted.close()
+
+        path = self._paths.get(shard)
+        if path is None:
+            path = self.output_dir / f"{shard}{SHARD_SUFFIX}"
+            handle = open(path, mode="w", buffering=self.buffer_size)
+            handle.write(self.header)
+            self._paths[shard] = path
+        else:
+            handle = open(path, mode="a", buffering=self.buffer_size)
+        self._handles[shard] = handle
+        return handle
+
+    def close(self) -> None:
+        """Flush and close every open handle."""
+        while self._handles:
+            _, handle = self._handles.popitem(last=False)
+            handle.close()
+
+    def __enter__(self) -> "ShardWriterPool":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+def _shard_key_function(
+    header: list[str], shard_by: ShardBy
+) -> Callable[[list[str]], Optional[str]]:
+    """Build a function mapping the fields of a lima.report row to the name of its shard.
+
+    The function returns None, rather than raising, if the row's barcode names are malformed.
+    """
+    if shard_by is ShardBy.movie:
+        zmw_index = header.index("ZMW")
+        return lambda fields: fields[zmw_index].split("/", 1)[0]
+
+    lowest_index = header.index("IdxLowestNamed")
+    if shard_by is ShardBy.barcode_set:
+        return lambda fields: try_barcode_set_from_barcode(fields[lowest_index])
+
+    highest_index = header.index("IdxHighestNamed")
+    return lambda fields: classify_barcodes(fields[lowest_index], fields[highest_index])
+
+
+def split_lima_report(
+    *,
+    lima_report: Path,
+    output_dir: Path,
+    shard_by: ShardBy = ShardBy.well,
+    prefix: str = "",
+    max_open_files: Optional[int] = None,
+    buffer_size: int = 1 << 20,
+    on_malformed: OnMalformed = OnMalformed.error,
+) -> None:
+    """Split a lima.report file into one shard per well, barcode set or movie
+
+    Each row is routed to its shard in a single streaming pass. The header is copied to every
+    shard, so each shard is itself a valid lima.report file.
+
+    Args:
+        lima_report: the lima.report file to split.
+        output_dir: the directory where shards will be written as
+            [prefix][shard].lima.report.
+        shard_by: the field used to route each row to a shard. When sharding by well, undesired
+            hybrids are written to their own shard.
+        prefix: string to prepend to the name of every shard file.
+        max_open_files: the maximum number of shard files held open at once. If not given, the
+            soft limit on open files less a headroom of 64 descriptors.
+        buffer_size: the size, in bytes, of the write buffer for each open shard file.
+        on_malformed: how rows with the wrong number of columns or unexpected barcode names are
+            handled: raise an error, skip them, or skip them and log a count per reason.
+    """
+    logger = logging.getLogger(__name__)
+    malformed = MalformedRows(on_malformed)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    header = read_lima_report_header(lima_report)
+    shard_key = _shard_key_function(header, shard_by)
+
+    header_line = "\t".join(header) + "\n"
+    with ShardWriterPool(
+        output_dir=output_dir,
+        header=header_line,
+        max_open_files=max_open_files,
+        buffer_size=buffer_size,
+    ) as pool:
+        for fields in iter_lima_report_rows(lima_report, malformed):
+            shard = shard_key(fields)
+            if shard is None:
+                malformed.record(
+                    MALFORMED_BARCODE,
+                    f"Barcodes in row {fields} do not match the barcode schema",
+                )
+                continue
+            line = "\t".join(fields) + "\n"
+            pool.get(f"{prefix}{shard}").write(line)
+            RUN_METRICS.rows_classified += 1
+            RUN_METRICS.bytes_out += len(line.encode())
+            if shard == HYBRID_STATUS:
+                RUN_METRICS.hybrids_found += 1
+
+    # every shard starts with the header
+    RUN_METRICS.bytes_out += len(header_line.encode()) * len(pool.paths)
+
+    malformed.log_summary(logger)
+    malformed.add_to(RUN_METRICS.malformed_rows)
@@ -1,5 +1,7 @@
 import pytest
 
+from longplexpy.barcodes import try_barcode_set_from_barcode
+from longplexpy.barcodes import try_well_from_barcode
 from longplexpy.barcodes import well_from_barcode
 
 
@@ -12,6 +14,11 @@ from longplexpy.barcodes import well_from_barcode
         ("seqwell_UDI3_A01_P7", "A01"),
         ("seqwell_UDI3_C03_P5", "C03"),
         ("seqwell_UDI3_C03_P7", "C03"),
+        # by default, any name with four fields is recognized, e.g. 384-well plates or other
+        # prefixes and adapters
+        ("seqwell_UDI1_P24_P5", "P24"),
+        ("acme_UDI1_A01_P5", "A01"),
+        ("seqwell_UDI1_A01_i7", "A01"),
     ],
 )
 def test_well_from_barcode(barcode_name: str, well: str) -> None:
@@ -32,3 +39,20 @@ def test_well_from_barcode(barcode_name: str, well: str) -> None:
 def test_well_from_barcode_raises_value_error(barcode_name: str) -> None:
     with pytest.raises(ValueError):
         well_from_barcode(barcode_name)
+
+
+@pytest.mark.parametrize(
+    "barcode_name, barcode_set",
+    [
+        ("seqwell_UDI1_A01_P5", "UDI1"),
+        ("seqwell_UDI3_C03_P7", "UDI3"),
+    ],
+)
+def test_try_barcode_set_from_barcode(barcode_name: str, barcode_set: str) -> None:
+    assert try_barcode_set_from_barcode(barcode_name) == barcode_set
+
+
+@pytest.mark.parametrize("barcode_name", ["-", "seqwell_UDI1A01_P7", "seqwell_UDI3_C03_P7_extra"])
+def test_try_from_barcode_returns_none(barcode_name: str) -> None:
+    assert try_well_from_barcode(barcode_name) is None
+    assert try_barcode_set_from_barcode(barcode_name) is None
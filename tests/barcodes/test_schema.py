@@ -0,0 +1,155 @@
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from longplexpy.barcodes import get_barcode_schema
+from longplexpy.barcodes import parse_barcode
+from longplexpy.barcodes import set_barcode_schema
+from longplexpy.barcodes import well_from_barcode
+from longplexpy.barcodes.schema import DEFAULT_BARCODE_SCHEMA
+from longplexpy.barcodes.schema import LONGPLEX_BARCODE_SCHEMA
+from longplexpy.barcodes.schema import AdapterRoles
+from longplexpy.barcodes.schema import BarcodeInfo
+from longplexpy.barcodes.schema import BarcodeSchema
+from longplexpy.barcodes.schema import PlateGeometry
+
+
+@pytest.fixture
+def restore_barcode_schema() -> Iterator[None]:
+    """Restore the default barcode schema after a test changes it."""
+    yield
+    set_barcode_schema(DEFAULT_BARCODE_SCHEMA)
+
+
+@pytest.mark.parametrize(
+    "barcode_name, info",
+    [
+        ("seqwell_UDI1_A01_P5", BarcodeInfo("UDI1", "A01", "P5")),
+        ("seqwell_UDI3_H12_P7", BarcodeInfo("UDI3", "H12", "P7")),
+        # any prefix, well and adapter are recognized, as before barcode schemas were added
+        ("seqwell_UDI1_P24_P5", BarcodeInfo("UDI1", "P24", "P5")),
+        ("acme_UDI1_A01_P5", BarcodeInfo("UDI1", "A01", "P5")),
+        ("seqwell_UDI1_A01_i7", BarcodeInfo("UDI1", "A01", "i7")),
+        ("seqwell_UDI_3_C03_P7", None),
+        ("seqwell__A01_P5", None),
+        ("seqwell_UDI1_A01", None),
+        ("-", None),
+    ],
+)
+def test_default_schema_lookup(barcode_name: str, info: BarcodeInfo) -> None:
+    assert DEFAULT_BARCODE_SCHEMA.lookup(barcode_name) == info
+    # a second lookup is answered from the cache
+    assert DEFAULT_BARCODE_SCHEMA.lookup(barcode_name) == info
+
+
+@pytest.mark.parametrize(
+    "barcode_name, info",
+    [
+        ("seqwell_UDI1_A01_P5", BarcodeInfo("UDI1", "A01", "P5")),
+        ("seqwell_UDI3_H12_P7", BarcodeInfo("UDI3", "H12", "P7")),
+        ("seqwell_UDI1_I01_P5", None),
+        ("seqwell_UDI1_A13_P5", None),
+        ("seqwell_UDI1_A01_P6", None),
+        ("other_UDI1_A01_P5", None),
+    ],
+)
+def test_longplex_schema_lookup(barcode_name: str, info: BarcodeInfo) -> None:
+    assert LONGPLEX_BARCODE_SCHEMA.lookup(barcode_name) == info
+
+
+def test_plate_geometry_wells() -> None:
+    wells = PlateGeometry(rows=16, columns=24).wells
+    assert len(wells) == 384
+    assert wells[0] == "A01"
+    assert wells[-1] == "P24"
+    assert len(PlateGeometry().wells) == 96
+
+
+def test_plate_geometry_invalid() -> None:
+    with pytest.raises(ValueError, match="rows"):
+        PlateGeometry(rows=27)
+    with pytest.raises(ValueError, match="columns"):
+        PlateGeometry(columns=0)
+
+
+def test_schema_with_barcode_sets_is_restricted() -> None:
+    schema = BarcodeSchema(
+        prefix="seqwell",
+        barcode_sets=("UDI1", "UDI2"),
+        adapters=AdapterRoles(i5="P5", i7="P7"),
+        plate=PlateGeometry(),
+    )
+    assert schema.lookup("seqwell_UDI2_B07_P7") == BarcodeInfo("UDI2", "B07", "P7")
+    assert schema.lookup("seqwell_UDI3_B07_P7") is None
+    assert schema.lookup("seqwell_UDI2_B07_P6") is None
+
+
+def test_schema_with_barcode_sets_and_any_well() -> None:
+    schema = BarcodeSchema(barcode_sets=("UDI1",))
+    assert schema.lookup("acme_UDI1_Z99_P7") == BarcodeInfo("UDI1", "Z99", "P7")
+    assert schema.lookup("acme_UDI2_A01_P7") is None
+
+
+def test_schema_from_toml(tmp_path: Path, restore_barcode_schema: None) -> None:
+    path = tmp_path / "plate384.toml"
+    path.write_text(
+        'prefix = "acme"\n'
+        'separator = "-"\n'
+        "\n"
+        "[adapters]\n"
+        'i5 = "i5"\n'
+        'i7 = "i7"\n'
+        "\n"
+        "[plate]\n"
+        "rows = 16\n"
+        "columns = 24\n"
+    )
+    schema = BarcodeSchema.from_file(path)
+    assert schema.plate == PlateGeometry(rows=16, columns=24)
+    assert schema.adapter_roles == AdapterRoles(i5="i5", i7="i7")
+    assert schema.lookup("acme-Set1-P24-i7") == BarcodeInfo("Set1", "P24", "i7")
+    assert schema.lookup("seqwell_UDI1_A01_P5") is None
+
+    set_barcode_schema(schema)
+    assert get_barcode_schema() is schema
+    assert parse_barcode("acme-Set1-P24-i5") == BarcodeInfo("Set1", "P24", "i5")
+    assert well_from_barcode("acme-Set1-M13-i5") == "M13"
+    with pytest.raises(ValueError, match="does not match the barcode schema"):
+        well_from_barcode("seqwell_UDI1_A01_P5")
+
+
+def test_schema_from_yaml(tmp_path: Path) -> None:
+    path = tmp_path / "schema.yaml"
+    path.write_text("barcode_sets:\n  - UDI1\nplate:\n  rows: 2\n  columns: 3\n")
+    schema = BarcodeSchema.from_file(path)
+    assert schema.barcode_sets == ("UDI1",)
+    # keys that are not given take the values of the LongPlex schema
+    assert schema.prefix == "seqwell"
+    assert schema.adapter_roles == AdapterRoles(i5="P5", i7="P7")
+    assert schema.lookup("seqwell_UDI1_B03_P5") == BarcodeInfo("UDI1", "B03", "P5")
+    assert schema.lookup("seqwell_UDI1_C01_P5") is None
+    assert schema.lookup("seqwell_UDI1_A01_i7") is None
+
+
+@pytest.mark.parametrize(
+    "config, match",
+    [
+        ({"prefx": "seqwell"}, "Unrecognized barcode schema keys"),
+        ({"plate": {"wells": 96}}, "Unrecognized barcode schema plate keys"),
+        ({"separator": ""}, "separator"),
+        ({"adapters": ["P5", "P7"]}, "adapters must be a table"),
+        ({"adapters": {"i5": "P5", "i9": "P9"}}, "Unrecognized barcode schema adapters keys"),
+        ({"adapters": {"i5": "P7"}}, "must differ"),
+        ({"adapters": {"i5": "P_5"}}, "Invalid adapter name"),
+        ({"barcode_sets": ["UDI_1"]}, "Invalid barcode set name"),
+    ],
+)
+def test_schema_from_dict_invalid(config: dict, match: str) -> None:
+    with pytest.raises(ValueError, match=match):
+        BarcodeSchema.from_dict(config)
+
+
+def test_schema_from_file_invalid_suffix(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="must be a .toml, .yaml or .yml file"):
+        BarcodeSchema.from_file(tmp_path / "schema.json")
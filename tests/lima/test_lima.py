@@ -1,7 +1,12 @@
+from pathlib import Path
+from typing import Optional
+
 import pytest
 
 import longplexpy.lima as lima
 from longplexpy.lima import LimaReportMetric
+from longplexpy.malformed import MalformedRows
+from longplexpy.prometheus import RUN_METRICS
 
 
 @pytest.mark.parametrize(
@@ -59,3 +64,44 @@ from longplexpy.lima import LimaReportMetric
 )
 def test_status_from_report_metric(report_row: LimaReportMetric, status: str) -> None:
     assert report_row.status == status
+
+
+@pytest.mark.parametrize(
+    "zmw, key",
+    [
+        ("m1/2/ccs", ("m1", 2, "ccs")),
+        ("m1/10", ("m1", 10, "")),
+        ("m1", ("m1", -1, "")),
+    ],
+)
+def test_zmw_sort_key(zmw: str, key: tuple[str, int, str]) -> None:
+    assert lima.zmw_sort_key(zmw) == key
+
+
+@pytest.mark.parametrize(
+    "lowest_named, highest_named, expected",
+    [
+        ("seqwell_UDI1_A01_P5", "seqwell_UDI1_A01_P7", "A01"),
+        ("seqwell_UDI1_A01_P5", "seqwell_UDI1_B01_P7", lima.HYBRID_STATUS),
+        ("-", "seqwell_UDI1_A01_P7", None),
+        ("seqwell_UDI1_A01_P5", "custom_A01_P7", None),
+    ],
+)
+def test_classify_barcodes(lowest_named: str, highest_named: str, expected: Optional[str]) -> None:
+    assert lima.classify_barcodes(lowest_named, highest_named) == expected
+
+
+def test_iter_lima_report_rows_counts_bytes_read(tmp_path: Path) -> None:
+    """Test that bytes read are counted as encoded on disk, including CRLF line endings."""
+    report_path = tmp_path / "sample.lima.report"
+    report_path.write_bytes(
+        "ZMW\tIdxLowestNamed\r\n"
+        "m1/1/ccs\tseqwell_UDI1_A01_P5\r\n"
+        "m1/2/ccs_\u00e9\tseqwell_UDI1_A01_P5\r\n".encode()
+    )
+    bytes_in = RUN_METRICS.bytes_in
+
+    rows = list(lima.iter_lima_report_rows(report_path, MalformedRows()))
+
+    assert rows[1] == ["m1/2/ccs_\u00e9", "seqwell_UDI1_A01_P5"]
+    assert RUN_METRICS.bytes_in - bytes_in == report_path.stat().st_size
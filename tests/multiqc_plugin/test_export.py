@@ -0,0 +1,47 @@
+import gzip
+from pathlib import Path
+
+import pytest
+from pyarrow import dataset
+
+from longplexpy.multiqc_plugin.export import EXPORT_FORMAT_ARROW
+from longplexpy.multiqc_plugin.export import EXPORT_FORMAT_PARQUET
+from longplexpy.multiqc_plugin.export import EXPORT_FORMAT_TSV
+from longplexpy.multiqc_plugin.export import resolve_export_format
+from longplexpy.multiqc_plugin.export import write_metrics_table
+
+ROWS = [
+    {"sample": "bc1015", "well": "A01", "count": 248},
+    {"sample": "bc1015", "well": "B01", "count": 206},
+]
+COLUMNS = ["sample", "well", "count"]
+
+
+def test_write_metrics_table_tsv(tmp_path: Path) -> None:
+    path = write_metrics_table(
+        rows=ROWS, columns=COLUMNS, path=tmp_path / "run1", export_format=EXPORT_FORMAT_TSV
+    )
+    assert path == tmp_path / "run1.tsv.gz"
+    with gzip.open(path, mode="rt") as in_file:
+        assert in_file.read().splitlines() == [
+            "sample\twell\tcount",
+            "bc1015\tA01\t248",
+            "bc1015\tB01\t206",
+        ]
+
+
+@pytest.mark.parametrize("export_format", [EXPORT_FORMAT_PARQUET, EXPORT_FORMAT_ARROW])
+def test_write_metrics_table_columnar(tmp_path: Path, export_format: str) -> None:
+    for run_id in ["run1", "run2"]:
+        write_metrics_table(
+            rows=ROWS, columns=COLUMNS, path=tmp_path / run_id, export_format=export_format
+        )
+
+    table = dataset.dataset(tmp_path, format="ipc" if export_format == "arrow" else export_format)
+    assert table.to_table().column_names == COLUMNS
+    assert table.count_rows() == 2 * len(ROWS)
+
+
+def test_resolve_export_format_raises_value_error() -> None:
+    with pytest.raises(ValueError):
+        resolve_export_format("xlsx")
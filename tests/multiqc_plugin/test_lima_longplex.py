@@ -0,0 +1,320 @@
+import gzip
+import math
+import shutil
+from pathlib import Path
+from typing import Any
+from typing import Optional
+
+import multiqc  # type: ignore
+import pytest
+from multiqc import report
+from pyarrow import dataset
+
+from longplexpy.barcodes import set_barcode_schema
+from longplexpy.barcodes.schema import DEFAULT_BARCODE_SCHEMA
+from longplexpy.malformed import MALFORMED_BARCODE
+from longplexpy.malformed import MALFORMED_COLUMN_COUNT
+from longplexpy.malformed import MALFORMED_COUNT_HYBRID
+from longplexpy.malformed import MALFORMED_COUNT_VALUE
+from longplexpy.malformed import MalformedRows
+from longplexpy.malformed import OnMalformed
+from longplexpy.multiqc_plugin import BARCODE_SCHEMA_CONFIG_KEY
+from longplexpy.multiqc_plugin import DEFAULT_EXPORT_FORMAT
+from longplexpy.multiqc_plugin import DEFAULT_LARGE_COHORT_POOLS
+from longplexpy.multiqc_plugin import DEFAULT_MAX_PLOT_SERIES
+from longplexpy.multiqc_plugin import DEFAULT_ON_MALFORMED
+from longplexpy.multiqc_plugin import EXPORT_DIR_CONFIG_KEY
+from longplexpy.multiqc_plugin import EXPORT_FORMAT_CONFIG_KEY
+from longplexpy.multiqc_plugin import LARGE_COHORT_POOLS_CONFIG_KEY
+from longplexpy.multiqc_plugin import MAX_PLOT_SERIES_CONFIG_KEY
+from longplexpy.multiqc_plugin import ON_MALFORMED_CONFIG_KEY
+from longplexpy.multiqc_plugin.modules.lima_longplex import LimaCountMetric
+from longplexpy.multiqc_plugin.modules.lima_longplex import LimaLongPlexModule
+
+DATA_DIR: Path = Path(__file__).parent.parent / "data"
+"""The Lima LongPlex outputs of a single pool, bc1015."""
+
+STAGE_FLOW_CONTENTS: str = (
+    "well\ti7_i5_only\teither_i7_i5_only\tdouble_assigned\tdouble_assigned_conflict\n"
+    "A01\t10\t2\t1\t0\n"
+    "B01\t7\t3\t0\t1\n"
+)
+
+
+DEFAULT_OPTIONS: dict[str, Any] = {
+    LARGE_COHORT_POOLS_CONFIG_KEY: DEFAULT_LARGE_COHORT_POOLS,
+    MAX_PLOT_SERIES_CONFIG_KEY: DEFAULT_MAX_PLOT_SERIES,
+    EXPORT_DIR_CONFIG_KEY: "null",
+    EXPORT_FORMAT_CONFIG_KEY: DEFAULT_EXPORT_FORMAT,
+    BARCODE_SCHEMA_CONFIG_KEY: "null",
+    ON_MALFORMED_CONFIG_KEY: DEFAULT_ON_MALFORMED,
+}
+"""The default value of every plugin option in a MultiQC configuration file."""
+
+
+def run_module(analysis_dir: Path, tmp_path: Path, **options: Any) -> list[str]:
+    """Run the Lima LongPlex module on a directory, returning the IDs of the plots it added.
+
+    Keyword arguments are written to a MultiQC configuration file.
+    """
+    # configuration keys persist across runs in a process, so every plugin option is written
+    options = {**DEFAULT_OPTIONS, **options}
+    config_file = tmp_path / "multiqc_config.yaml"
+    config_file.write_text("".join(f"{key}: {value}\n" for key, value in options.items()))
+    multiqc.reset()
+    multiqc.parse_logs(
+        analysis_dir, quiet=True, run_modules=["longplexpy"], config_files=[config_file]
+    )
+    return list(report.plot_by_id.keys())
+
+
+def write_pool(analysis_dir: Path, pool: str, well_counts: dict[str, int]) -> None:
+    """Write the Lima LongPlex outputs of a pool with the given i7_i5 ZMW counts per well."""
+    i7_i5_dir = analysis_dir / "demux_i7_i5"
+    either_dir = analysis_dir / "demux_either_i7_i5"
+    i7_i5_dir.mkdir(parents=True, exist_ok=True)
+    either_dir.mkdir(parents=True, exist_ok=True)
+    shutil.copy(
+        DATA_DIR / "demux_i7_i5" / "i7_i5_bc1015.lima.summary",
+        i7_i5_dir / f"i7_i5_{pool}.lima.summary",
+    )
+    shutil.copy(
+        DATA_DIR / "demux_either_i7_i5" / "i7_5_bc1015.lima.summary",
+        either_dir / f"i7_5_{pool}.lima.summary",
+    )
+    header = "IdxFirst\tIdxCombined\tIdxFirstNamed\tIdxCombinedNamed\tCounts\tMeanScore\n"
+    # the first row after the header is not parsed by `LimaCountMetric.from_counts_text`
+    skipped = "0\t0\t-\t-\t0\t0\n"
+    rows = "".join(
+        f"0\t1\tseqwell_UDI1_{well}_P5\tseqwell_UDI1_{well}_P7\t{count}\t99\n"
+        for well, count in well_counts.items()
+    )
+    (i7_i5_dir / f"i7_i5_{pool}.lima.counts").write_text(header + skipped + rows)
+    (either_dir / f"i7_5_{pool}.lima.counts").write_text(header)
+
+
+COUNTS_WITH_MALFORMED_ROWS: str = (
+    "IdxFirst\tIdxCombined\tIdxFirstNamed\tIdxCombinedNamed\tCounts\tMeanScore\n"
+    "0\t0\t-\t-\t0\t0\n"
+    "0\t1\tseqwell_UDI1_A01_P5\tseqwell_UDI1_A01_P7\t248\t98\n"
+    "1\t1\tseqwell_UDI1_A01_P7\tseqwell_UDI1_A01_P7\t12\t98\n"
+    "2\t3\tseqwell_UDI1_A02_P5\tseqwell_UDI1_B02_P7\t5\t98\n"
+    "4\t4\t-\t-\t7\t0\n"
+    "5\t5\tseqwell_UDI1_A03_P5\n"
+    "6\t7\tseqwell_UDI1_A04_P5\tseqwell_UDI1_A04_P7\tNA\t98\n"
+)
+"""A lima.counts file with one undesired hybrid, one unbarcoded row, one short row and one row with
+a non-numeric count."""
+
+
+def test_from_counts_text_counts_malformed_rows() -> None:
+    for _ in range(2):
+        malformed = MalformedRows(OnMalformed.count)
+        metric = LimaCountMetric.from_counts_text(COUNTS_WITH_MALFORMED_ROWS, malformed)
+        assert metric.well_counts == {"A01": {"P5+P7": 248, "P7": 12}}
+        assert dict(malformed.counts) == {
+            MALFORMED_BARCODE: 1,
+            MALFORMED_COLUMN_COUNT: 1,
+            MALFORMED_COUNT_HYBRID: 1,
+            MALFORMED_COUNT_VALUE: 1,
+        }
+
+
+@pytest.mark.parametrize("on_malformed", [OnMalformed.error, None])
+def test_from_counts_text_raises_on_malformed_rows(on_malformed: Optional[OnMalformed]) -> None:
+    malformed = None if on_malformed is None else MalformedRows(on_malformed)
+    with pytest.raises(ValueError, match="undesired hybrid"):
+        LimaCountMetric.from_counts_text(COUNTS_WITH_MALFORMED_ROWS, malformed)
+
+
+@pytest.mark.parametrize(
+    "well_totals, wells_demuxed, well_cv",
+    [
+        ({}, 0, 0.0),
+        ({"A01": 0, "A02": 0}, 0, 0.0),
+        ({"A01": 100, "A02": 100}, 2, 0.0),
+        ({"A01": 10, "A02": 30}, 2, 0.5),
+        ({"A01": 0, "A02": 40}, 1, 1.0),
+    ],
+)
+def test_summarize_well_balance(
+    well_totals: dict[str, int], wells_demuxed: int, well_cv: float
+) -> None:
+    balance = LimaLongPlexModule.summarize_well_balance(well_totals)
+    assert balance["wells_demuxed"] == wells_demuxed
+    assert balance["well_cv"] == pytest.approx(well_cv)
+
+
+@pytest.mark.parametrize("large_cohort_pools, large_cohort", [(3, False), (2, True)])
+def test_large_cohort_threshold(
+    tmp_path: Path, large_cohort_pools: int, large_cohort: bool
+) -> None:
+    analysis_dir = tmp_path / "analysis"
+    for pool in ["bcA", "bcB", "bcC"]:
+        write_pool(analysis_dir, pool, {"A01": 100, "A02": 100})
+
+    plot_ids = run_module(analysis_dir, tmp_path, longplexpy_large_cohort_pools=large_cohort_pools)
+    assert ("lima_longplex_well_demux_fractions" in plot_ids) is not large_cohort
+    assert ("lima_longplex_well_balance_table" in plot_ids) is large_cohort
+    assert ("lima_longplex_well_relative_yield" in plot_ids) is large_cohort
+    # per-well counts of every pool are written in either mode
+    well_counts = Path(report.data_tmp_dir()) / "multiqc_longplexpy_well_counts.txt"
+    assert len(well_counts.read_text().splitlines()) == 1 + 3 * 2
+
+
+def test_large_cohort_shows_least_balanced_pools(tmp_path: Path) -> None:
+    analysis_dir = tmp_path / "analysis"
+    write_pool(analysis_dir, "bcEven", {"A01": 100, "A02": 100})
+    write_pool(analysis_dir, "bcSkewed", {"A01": 190, "A02": 10})
+    write_pool(analysis_dir, "bcMid", {"A01": 150, "A02": 50})
+
+    run_module(
+        analysis_dir, tmp_path, longplexpy_large_cohort_pools=0, longplexpy_max_plot_series=2
+    )
+    heatmap = report.plot_by_id["lima_longplex_well_relative_yield"]
+    assert heatmap.datasets[0].ycats == ["bcSkewed", "bcMid"]
+    assert heatmap.datasets[0].xcats == ["A01", "A02"]
+    assert heatmap.datasets[0].rows[0] == pytest.approx([1.9, 0.1])
+
+
+def test_module_uses_barcode_schema_adapters(tmp_path: Path) -> None:
+    analysis_dir = tmp_path / "analysis"
+    write_pool(analysis_dir, "bcA", {})
+    counts = (
+        "IdxFirst\tIdxCombined\tIdxFirstNamed\tIdxCombinedNamed\tCounts\tMeanScore\n"
+        "0\t0\t-\t-\t0\t0\n"
+        "0\t1\tacme-Set1-P24-i5\tacme-Set1-P24-i7\t100\t99\n"
+        "1\t1\tacme-Set1-P24-i7\tacme-Set1-P24-i7\t20\t99\n"
+        "2\t2\tacme-Set1-A01-i5\tacme-Set1-A01-i5\t3\t99\n"
+    )
+    (analysis_dir / "demux_i7_i5" / "i7_i5_bcA.lima.counts").write_text(counts)
+    schema_path = tmp_path / "schema.toml"
+    schema_path.write_text(
+        'prefix = "acme"\nseparator = "-"\n[adapters]\ni5 = "i5"\ni7 = "i7"\n'
+        "[plate]\nrows = 16\ncolumns = 24\n"
+    )
+
+    try:
+        plot_ids = run_module(analysis_dir, tmp_path, longplexpy_barcode_schema=schema_path)
+    finally:
+        set_barcode_schema(DEFAULT_BARCODE_SCHEMA)
+
+    summary = (Path(report.data_tmp_dir()) / "multiqc_longplexpy_limalongplex.txt").read_text()
+    header, row = [line.split("\t") for line in summary.splitlines()]
+    metrics = dict(zip(header, row, strict=True))
+    assert metrics["i7_and_i5_demuxed"] == "100"
+    assert metrics["i7_demuxed"] == "20"
+    assert metrics["i5_demuxed"] == "3"
+
+    assert "lima_longplex_well_demux_fractions" in plot_ids
+    well_plot = report.plot_by_id["lima_longplex_well_demux_fractions"].datasets[0]
+    # wells without a category are plotted as NaN
+    assert {
+        category["name"]: {
+            well: count
+            for well, count in zip(well_plot.samples, category["data"], strict=True)
+            if not math.isnan(count)
+        }
+        for category in well_plot.cats
+    } == {
+        "ZMWs with i5 and i7": {"P24": 100},
+        "ZMWs with i7": {"P24": 20},
+        "ZMWs with i5": {"A01": 3},
+    }
+
+
+def test_parse_stage_flow_contents() -> None:
+    assert LimaLongPlexModule.parse_stage_flow_contents(STAGE_FLOW_CONTENTS) == {
+        "A01": {
+            "i7_i5_only": 10,
+            "either_i7_i5_only": 2,
+            "double_assigned": 1,
+            "double_assigned_conflict": 0,
+        },
+        "B01": {
+            "i7_i5_only": 7,
+            "either_i7_i5_only": 3,
+            "double_assigned": 0,
+            "double_assigned_conflict": 1,
+        },
+    }
+
+
+def test_stage_flow_is_shown_per_well(tmp_path: Path) -> None:
+    analysis_dir = tmp_path / "analysis"
+    shutil.copytree(DATA_DIR, analysis_dir)
+    (analysis_dir / "bc1015.stage_flow.txt").write_text(STAGE_FLOW_CONTENTS)
+
+    plot_ids = run_module(analysis_dir, tmp_path)
+    assert "lima_longplex_stage_transitions" in plot_ids
+    assert "lima_longplex_well_stage_transitions" in plot_ids
+
+    data_dir = Path(report.data_tmp_dir())
+    by_well = (data_dir / "multiqc_longplexpy_stage_flow_by_well.txt").read_text().splitlines()
+    assert by_well == [
+        "Sample\twell\ti7_i5_only\teither_i7_i5_only\tdouble_assigned\tdouble_assigned_conflict",
+        "bc1015\tA01\t10\t2\t1\t0",
+        "bc1015\tB01\t7\t3\t0\t1",
+    ]
+    totals = (data_dir / "multiqc_longplexpy_stage_flow.txt").read_text().splitlines()
+    assert totals[1] == "bc1015\t17\t5\t1\t1"
+
+
+def test_stage_flow_per_well_is_hidden_for_large_cohorts(tmp_path: Path) -> None:
+    analysis_dir = tmp_path / "analysis"
+    shutil.copytree(DATA_DIR, analysis_dir)
+    (analysis_dir / "bc1015.stage_flow.txt").write_text(STAGE_FLOW_CONTENTS)
+
+    plot_ids = run_module(analysis_dir, tmp_path, longplexpy_large_cohort_pools=0)
+    assert "lima_longplex_stage_transitions" in plot_ids
+    assert "lima_longplex_well_stage_transitions" not in plot_ids
+    assert (Path(report.data_tmp_dir()) / "multiqc_longplexpy_stage_flow_by_well.txt").exists()
+
+
+def test_export_metrics_appends_per_run(tmp_path: Path) -> None:
+    analysis_dir = tmp_path / "analysis"
+    write_pool(analysis_dir, "bcA", {"A01": 100, "A02": 50})
+    write_pool(analysis_dir, "bcB", {"A01": 80})
+    export_dir = tmp_path / "export"
+    for _ in range(2):
+        run_module(analysis_dir, tmp_path, longplexpy_export_dir=export_dir)
+
+    assert len(list((export_dir / "summary").glob("*.parquet"))) == 2
+    summary = dataset.dataset(export_dir / "summary", format="parquet").to_table().to_pylist()
+    assert sorted(row["sample"] for row in summary) == ["bcA", "bcA", "bcB", "bcB"]
+    assert len({row["run_id"] for row in summary}) == 2
+
+    well_counts = dataset.dataset(export_dir / "well_counts", format="parquet").to_table()
+    well_rows = well_counts.to_pylist()
+    assert well_counts.column_names == ["run_id", "sample", "well", "adapter_set", "count"]
+    assert len(well_rows) == 2 * 3
+    assert {row["run_id"] for row in well_rows} == {row["run_id"] for row in summary}
+    for run_id in {row["run_id"] for row in well_rows}:
+        assert sorted(
+            (row["sample"], row["well"], row["count"])
+            for row in well_rows
+            if row["run_id"] == run_id
+        ) == [("bcA", "A01", 100), ("bcA", "A02", 50), ("bcB", "A01", 80)]
+
+
+def test_export_metrics_tsv(tmp_path: Path) -> None:
+    analysis_dir = tmp_path / "analysis"
+    write_pool(analysis_dir, "bcA", {"A01": 100})
+    export_dir = tmp_path / "export"
+    for _ in range(2):
+        run_module(
+            analysis_dir,
+            tmp_path,
+            longplexpy_export_dir=export_dir,
+            longplexpy_export_format="tsv",
+        )
+
+    run_ids: set[str] = set()
+    for path in sorted((export_dir / "well_counts").glob("*.tsv.gz")):
+        with gzip.open(path, mode="rt") as in_file:
+            header, *rows = in_file.read().splitlines()
+        assert header == "run_id\tsample\twell\tadapter_set\tcount"
+        assert [row.split("\t")[1:] for row in rows] == [["bcA", "A01", "P5+P7", "100"]]
+        run_ids.update(row.split("\t")[0] for row in rows)
+    assert len(run_ids) == 2
+    assert len(list((export_dir / "summary").glob("*.tsv.gz"))) == 2
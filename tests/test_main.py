@@ -1,22 +1,267 @@
+import subprocess
+import sys
 from inspect import isfunction
-from typing import Callable
+from pathlib import Path
+from typing import Iterator
 
 import pytest
 from defopt import signature
 
 from longplexpy import main
+from longplexpy.barcodes import set_barcode_schema
+from longplexpy.barcodes.schema import DEFAULT_BARCODE_SCHEMA
+from longplexpy.lima import LimaReportMetric
+
+IMPORT_TIME_BUDGET_US: int = 50_000
+"""The maximum cumulative time, in microseconds, to import the longplexpy entry point."""
+
+COLD_START_BUDGET_US: int = 250_000
+"""The maximum cumulative time, in microseconds, to import everything needed to run (or show the
+help of) a single tool: defopt, the entry point and the tool itself. Most of it is defopt."""
+
+TOOL_IMPORT_BUDGET_US: int = 50_000
+"""The maximum cumulative time, in microseconds, of the cold start excluding defopt."""
+
+HEAVY_MODULES: list[str] = ["fgpyo", "pysam", "multiqc", "defopt"]
+"""Modules which must not be imported by the entry point until a tool runs."""
+
+
+def _import_times(code: str, top_level: bool = False) -> dict[str, int]:
+    """Run code in a fresh interpreter and return the cumulative import time of each module it
+    imported, in microseconds.
+
+    If `top_level` is True, only modules imported directly by the code are returned, so their
+    import times sum to the total import time of the code. Modules imported when the interpreter
+    starts are never returned.
+    """
+
+    def run(code: str) -> dict[str, int]:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        import_times: dict[str, int] = {}
+        for line in result.stderr.splitlines():
+            fields = line.removeprefix("import time:").split("|")
+            if len(fields) == 3 and fields[1].strip().isdigit():
+                # nested imports are indented by two spaces per level
+                if not top_level or not fields[2].startswith("   "):
+                    import_times[fields[2].strip()] = int(fields[1])
+        return import_times
+
+    startup_modules = run("pass").keys()
+    return {
+        module: import_time
+        for module, import_time in run(code).items()
+        if module not in startup_modules
+    }
 
 
 @pytest.mark.parametrize("tool", main._tools)
-def test_tools_are_defined(tool: Callable) -> None:
+def test_tools_are_defined(tool: str) -> None:
     """Test that all command line tools passed to defopt are defined functions."""
-    assert isfunction(tool)
+    assert isfunction(main.load_tool(tool))
 
 
 @pytest.mark.parametrize("tool", main._tools)
-def test_tools_have_valid_docstrings(tool: Callable) -> None:
+def test_tools_have_valid_docstrings(tool: str) -> None:
     """Test that all command line tools have a valid defopt docstring."""
     try:
-        signature(tool)
+        signature(main.load_tool(tool))
     except TypeError:
-        raise AssertionError(f"defopt could not parse docstring for {tool.__name__}") from None
+        raise AssertionError(f"defopt could not parse docstring for {tool}") from None
+
+
+@pytest.mark.parametrize(
+    "argv, expected",
+    [
+        (["list-undesired-hybrids", "--help"], ["list_undesired_hybrids"]),
+        (["split-lima-report"], ["split_lima_report"]),
+        (["--help"], main._tools),
+        ([], main._tools),
+    ],
+)
+def test_selected_tools(argv: list[str], expected: list[str]) -> None:
+    assert main.selected_tools(argv) == expected
+
+
+def test_parse_global_options() -> None:
+    options, argv = main.parse_global_options(
+        ["--metrics-file", "run.prom", "split-lima-report", "--prefix", "bc1015."]
+    )
+    assert options.metrics_file == Path("run.prom")
+    assert options.metrics_sample == ""
+    assert options.barcode_schema is None
+    assert argv == ["split-lima-report", "--prefix", "bc1015."]
+
+
+def test_parse_global_options_barcode_schema() -> None:
+    options, argv = main.parse_global_options(
+        ["--barcode-schema", "plate384.toml", "list-undesired-hybrids"]
+    )
+    assert options.barcode_schema == Path("plate384.toml")
+    assert argv == ["list-undesired-hybrids"]
+
+
+def test_parse_global_options_after_tool_name() -> None:
+    """Test that entry point options after the tool name are left for the tool."""
+    argv = ["split-lima-report", "--metrics-file", "run.prom", "--barcode-schema", "p.toml"]
+    options, remaining = main.parse_global_options(["--metrics-sample", "bc1015", *argv])
+    assert options.metrics_sample == "bc1015"
+    assert options.metrics_file is None
+    assert options.barcode_schema is None
+    assert remaining == argv
+
+
+@pytest.fixture
+def restore_barcode_schema() -> Iterator[None]:
+    """Restore the default barcode schema after a test changes it."""
+    yield
+    set_barcode_schema(DEFAULT_BARCODE_SCHEMA)
+
+
+def test_run_help(monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture) -> None:
+    """Test that top-level help lists every tool and the entry point options."""
+    monkeypatch.setattr(sys, "argv", ["longplexpy", "--help"])
+    with pytest.raises(SystemExit) as exit_info:
+        main.run()
+    assert exit_info.value.code == 0
+    out = capsys.readouterr().out
+    for tool in main._tools:
+        assert tool.replace("_", "-") in out
+    assert "--barcode-schema" in out
+
+
+def test_run_with_global_options(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, restore_barcode_schema: None
+) -> None:
+    """Test running a tool with a barcode schema and a metrics file given before the tool name."""
+    schema_path = tmp_path / "schema.toml"
+    schema_path.write_text('prefix = "acme"\nseparator = "-"\n')
+    report_path = tmp_path / "sample.lima.report"
+    LimaReportMetric.write(
+        report_path,
+        LimaReportMetric(
+            ZMW="zmw1", IdxLowestNamed="acme-UDI1-A01-P5", IdxHighestNamed="acme-UDI1-A01-P7"
+        ),
+        LimaReportMetric(
+            ZMW="zmw2", IdxLowestNamed="acme-UDI1-A01-P5", IdxHighestNamed="acme-UDI1-B01-P7"
+        ),
+    )
+    output_path = tmp_path / "sample.hybrids.txt"
+    metrics_path = tmp_path / "run.prom"
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "longplexpy",
+            "--barcode-schema",
+            str(schema_path),
+            "--metrics-file",
+            str(metrics_path),
+            "--metrics-sample",
+            "bc1015",
+            "list-undesired-hybrids",
+            "--lima-report",
+            str(report_path),
+            "--output",
+            str(output_path),
+        ],
+    )
+
+    main.run()
+
+    assert output_path.read_text() == "zmw2/ccs\n"
+    assert 'tool="list_undesired_hybrids",sample="bc1015"' in metrics_path.read_text()
+
+
+def test_run_with_global_option_names_after_tool_name(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+) -> None:
+    """Test that entry point options after the tool name are passed to the tool, which rejects
+    them as it has no such options."""
+    report_path = tmp_path / "sample.lima.report"
+    LimaReportMetric.write(report_path)
+    metrics_path = tmp_path / "run.prom"
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "longplexpy",
+            "list-undesired-hybrids",
+            "--lima-report",
+            str(report_path),
+            "--output",
+            str(tmp_path / "sample.hybrids.txt"),
+            "--metrics-file",
+            str(metrics_path),
+        ],
+    )
+    with pytest.raises(SystemExit) as exit_info:
+        main.run()
+    assert exit_info.value.code == 2
+    assert "unrecognized arguments: --metrics-file" in capsys.readouterr().err
+    assert not metrics_path.exists()
+
+
+@pytest.mark.parametrize(
+    "tool_args, output",
+    [
+        (["list-undesired-hybrids", "-l", "{report}", "-o", "{out}/hybrids.txt"], "hybrids.txt"),
+        (["split-lima-report", "-l", "{report}", "-o", "{out}/shards"], "shards/A01.lima.report"),
+        (
+            ["reconcile-demux-stages", "-i", "{report}", "-e", "{report}", "-o", "{out}/sample"],
+            "sample.stage_flow.txt",
+        ),
+    ],
+)
+def test_run_with_short_output_flag(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, tool_args: list[str], output: str
+) -> None:
+    """Test that every tool accepts -o for its output, alongside --on-malformed."""
+    report_path = tmp_path / "sample.lima.report"
+    LimaReportMetric.write(
+        report_path,
+        LimaReportMetric(
+            ZMW="m1/1/ccs",
+            IdxLowestNamed="seqwell_UDI1_A01_P5",
+            IdxHighestNamed="seqwell_UDI1_A01_P7",
+        ),
+    )
+    argv = [arg.format(report=report_path, out=tmp_path) for arg in tool_args]
+    monkeypatch.setattr(sys, "argv", ["longplexpy", *argv])
+
+    main.run()
+
+    assert (tmp_path / output).exists()
+
+
+@pytest.mark.timing
+def test_entry_point_import_time_budget() -> None:
+    """Test that importing the entry point is fast and defers heavy dependencies."""
+    import_times = _import_times("import longplexpy.main")
+    assert import_times["longplexpy.main"] < IMPORT_TIME_BUDGET_US
+    assert not any(module.split(".")[0] in HEAVY_MODULES for module in import_times)
+
+
+@pytest.mark.parametrize("tool", main._tools)
+def test_tool_import_defers_heavy_dependencies(tool: str) -> None:
+    """Test that selecting a tool does not import heavy dependencies until it runs."""
+    import_times = _import_times(f"import longplexpy.tools.{tool}")
+    assert not any(module.split(".")[0] in HEAVY_MODULES for module in import_times)
+
+
+@pytest.mark.timing
+@pytest.mark.parametrize("tool", main._tools)
+def test_cold_start_import_time_budget(tool: str) -> None:
+    """Test the import time of running a single tool from a cold start, as `longplexpy <tool>`
+    imports defopt, the entry point and the selected tool before parsing any arguments."""
+    # an import statement rather than `main.load_tool`, as -X importtime does not time modules
+    # imported with importlib.import_module
+    import_times = _import_times(
+        f"import defopt; import longplexpy.main; import longplexpy.tools.{tool}", top_level=True
+    )
+    assert sum(import_times.values()) < COLD_START_BUDGET_US
+    assert sum(import_times.values()) - import_times["defopt"] < TOOL_IMPORT_BUDGET_US
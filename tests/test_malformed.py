@@ -0,0 +1,109 @@
+import logging
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from longplexpy.lima import LimaReportMetric
+from longplexpy.malformed import MALFORMED_BARCODE
+from longplexpy.malformed import MALFORMED_COLUMN_COUNT
+from longplexpy.malformed import MalformedRows
+from longplexpy.malformed import OnMalformed
+from longplexpy.prometheus import RUN_METRICS
+from longplexpy.tools.list_undesired_hybrids import list_undesired_hybrids
+from longplexpy.tools.reconcile_demux_stages import reconcile_demux_stages
+from longplexpy.tools.split_lima_report import split_lima_report
+
+
+def test_malformed_rows_error_raises_value_error() -> None:
+    malformed = MalformedRows(OnMalformed.error)
+    with pytest.raises(ValueError, match="bad row"):
+        malformed.record(MALFORMED_BARCODE, "bad row")
+
+
+def test_malformed_rows_skip_does_not_tally() -> None:
+    malformed = MalformedRows(OnMalformed.skip)
+    malformed.record(MALFORMED_BARCODE, "bad row")
+    assert dict(malformed.counts) == {}
+
+
+def test_malformed_rows_count_tallies_per_reason() -> None:
+    malformed = MalformedRows(OnMalformed.count)
+    malformed.record(MALFORMED_BARCODE, "bad row")
+    malformed.record(MALFORMED_BARCODE, "bad row")
+    malformed.record(MALFORMED_COLUMN_COUNT, "short row")
+    assert dict(malformed.counts) == {MALFORMED_BARCODE: 2, MALFORMED_COLUMN_COUNT: 1}
+
+
+def test_malformed_rows_add_to_running_total() -> None:
+    totals: dict[str, int] = {MALFORMED_BARCODE: 1}
+    for _ in range(2):
+        malformed = MalformedRows(OnMalformed.count)
+        malformed.record(MALFORMED_BARCODE, "bad row")
+        malformed.record(MALFORMED_COLUMN_COUNT, "short row")
+        malformed.add_to(totals)
+        assert dict(malformed.counts) == {MALFORMED_BARCODE: 1, MALFORMED_COLUMN_COUNT: 1}
+    assert totals == {MALFORMED_BARCODE: 3, MALFORMED_COLUMN_COUNT: 2}
+
+
+def test_malformed_rows_log_summary(caplog: pytest.LogCaptureFixture) -> None:
+    malformed = MalformedRows(OnMalformed.count)
+    malformed.record(MALFORMED_COLUMN_COUNT, "short row")
+    malformed.record(MALFORMED_BARCODE, "bad row")
+    malformed.record(MALFORMED_BARCODE, "bad row")
+    with caplog.at_level(logging.WARNING):
+        malformed.log_summary(logging.getLogger(__name__))
+    assert caplog.messages == [
+        f"Skipped 2 malformed rows: {MALFORMED_BARCODE}",
+        f"Skipped 1 malformed rows: {MALFORMED_COLUMN_COUNT}",
+    ]
+
+
+@pytest.mark.parametrize(
+    "run_tool, reports",
+    [
+        (
+            lambda report, out: list_undesired_hybrids(
+                lima_report=report, output=out / "hybrids.txt", on_malformed=OnMalformed.count
+            ),
+            1,
+        ),
+        (
+            lambda report, out: split_lima_report(
+                lima_report=report, output_dir=out, on_malformed=OnMalformed.count
+            ),
+            1,
+        ),
+        (
+            lambda report, out: reconcile_demux_stages(
+                i7_i5_report=report,
+                either_i7_i5_report=report,
+                output_prefix=out / "sample",
+                on_malformed=OnMalformed.count,
+            ),
+            2,
+        ),
+    ],
+)
+def test_tools_add_malformed_rows_to_run_metrics(
+    tmp_path: Path, run_tool: Callable[[Path, Path], None], reports: int
+) -> None:
+    """Test that each tool adds the malformed rows of its run, per reason, to the run metrics."""
+    report_path = tmp_path / "sample.lima.report"
+    LimaReportMetric.write(
+        report_path,
+        LimaReportMetric(
+            ZMW="m1/1/ccs",
+            IdxLowestNamed="seqwell_UDI1_A01_P5",
+            IdxHighestNamed="seqwell_UDI1_A01_P7",
+        ),
+        LimaReportMetric(ZMW="m1/2/ccs", IdxLowestNamed="-", IdxHighestNamed="-"),
+    )
+    with open(report_path, mode="a") as report:
+        report.write("m1/3/ccs\tseqwell_UDI1_A01_P5\n")
+    totals = dict(RUN_METRICS.malformed_rows)
+
+    run_tool(report_path, tmp_path)
+
+    for reason in [MALFORMED_BARCODE, MALFORMED_COLUMN_COUNT]:
+        assert RUN_METRICS.malformed_rows[reason] == totals.get(reason, 0) + reports
@@ -0,0 +1,64 @@
+from pathlib import Path
+
+import pytest
+
+from longplexpy.prometheus import RunMetrics
+from longplexpy.prometheus import RunMetricsReporter
+
+
+def _samples(path: Path) -> dict[str, float]:
+    """Read the samples of a Prometheus textfile, keyed by metric name and labels."""
+    samples: dict[str, float] = {}
+    for line in path.read_text().splitlines():
+        if not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_run_metrics_render() -> None:
+    metrics = RunMetrics(tool="split_lima_report", sample='bc"1015')
+    metrics.rows_classified = 10
+    metrics.hybrids_found = 2
+
+    rendered = metrics.render()
+
+    assert "# TYPE longplexpy_rows_classified_total counter" in rendered
+    assert (
+        'longplexpy_rows_classified_total{tool="split_lima_report",sample="bc\\"1015"} 10'
+        in rendered
+    )
+    assert 'longplexpy_hybrids_found_total{tool="split_lima_report",sample="bc\\"1015"} 2' in (
+        rendered
+    )
+
+
+def test_run_metrics_reporter(tmp_path: Path) -> None:
+    path = tmp_path / "longplexpy.prom"
+    metrics = RunMetrics()
+    labels = '{tool="list_undesired_hybrids",sample="bc1015"}'
+
+    with RunMetricsReporter(
+        path=path, tool="list_undesired_hybrids", sample="bc1015", metrics=metrics
+    ):
+        assert _samples(path)[f"longplexpy_running{labels}"] == 1
+        metrics.rows_classified += 5
+
+    samples = _samples(path)
+    assert samples[f"longplexpy_running{labels}"] == 0
+    assert samples[f"longplexpy_success{labels}"] == 1
+    assert samples[f"longplexpy_rows_classified_total{labels}"] == 5
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_run_metrics_reporter_records_failure(tmp_path: Path) -> None:
+    path = tmp_path / "longplexpy.prom"
+
+    def failing_run() -> None:
+        with RunMetricsReporter(path=path, tool="split_lima_report", metrics=RunMetrics()):
+            raise ValueError("failed")
+
+    with pytest.raises(ValueError):
+        failing_run()
+
+    assert _samples(path)['longplexpy_success{tool="split_lima_report",sample=""}'] == 0
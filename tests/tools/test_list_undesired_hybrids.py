@@ -1,7 +1,11 @@
 import os
 from pathlib import Path
 
+import pytest
+
 from longplexpy.lima import LimaReportMetric
+from longplexpy.malformed import OnMalformed
+from longplexpy.prometheus import RUN_METRICS
 from longplexpy.tools.list_undesired_hybrids import list_undesired_hybrids
 
 
@@ -27,6 +31,7 @@ def test_list_undesired_hybrids(tmp_path: Path) -> None:
     report_path = Path(os.path.join(tmp_path, "sample.lima.report"))
     output_path = Path(os.path.join(tmp_path, "sample.hybrids.txt"))
     LimaReportMetric.write(report_path, *(undesired_hybrids + pass_zmws))
+    bytes_in, bytes_out = RUN_METRICS.bytes_in, RUN_METRICS.bytes_out
     list_undesired_hybrids(
         lima_report=report_path,
         output=output_path,
@@ -36,3 +41,45 @@ def test_list_undesired_hybrids(tmp_path: Path) -> None:
     with open(output_path) as output:
         observed_zmws = [line.rstrip() for line in output.readlines()]
     assert observed_zmws == expected_reads
+    assert RUN_METRICS.bytes_in - bytes_in == report_path.stat().st_size
+    assert RUN_METRICS.bytes_out - bytes_out == output_path.stat().st_size
+
+
+def test_list_undesired_hybrids_384_well_plate(tmp_path: Path) -> None:
+    """Test that wells beyond H12 are recognized without a barcode schema."""
+    report_path = tmp_path / "sample.lima.report"
+    output_path = tmp_path / "sample.hybrids.txt"
+    LimaReportMetric.write(
+        report_path,
+        LimaReportMetric(
+            ZMW="zmw1", IdxLowestNamed="seqwell_UDI1_P24_P5", IdxHighestNamed="seqwell_UDI1_P24_P7"
+        ),
+        LimaReportMetric(
+            ZMW="zmw2", IdxLowestNamed="seqwell_UDI1_I13_P5", IdxHighestNamed="seqwell_UDI1_P24_P7"
+        ),
+    )
+    list_undesired_hybrids(lima_report=report_path, output=output_path)
+    assert output_path.read_text() == "zmw2/ccs\n"
+
+
+def test_list_undesired_hybrids_on_malformed(tmp_path: Path) -> None:
+    report_path = tmp_path / "sample.lima.report"
+    output_path = tmp_path / "sample.hybrids.txt"
+    LimaReportMetric.write(
+        report_path,
+        LimaReportMetric(ZMW="zmw1", IdxLowestNamed="-", IdxHighestNamed="-"),
+        LimaReportMetric(
+            ZMW="zmw2", IdxLowestNamed="seqwell_UDI1_A01_P5", IdxHighestNamed="seqwell_UDI1_B01_P5"
+        ),
+    )
+    with open(report_path, mode="a") as report:
+        report.write("zmw3\tseqwell_UDI1_A01_P5\n")
+
+    with pytest.raises(ValueError):
+        list_undesired_hybrids(lima_report=report_path, output=output_path)
+
+    for on_malformed in [OnMalformed.skip, OnMalformed.count]:
+        list_undesired_hybrids(
+            lima_report=report_path, output=output_path, on_malformed=on_malformed
+        )
+        assert output_path.read_text() == "zmw2/ccs\n"
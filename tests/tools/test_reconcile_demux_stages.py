@@ -0,0 +1,154 @@
+from pathlib import Path
+
+import pytest
+
+from longplexpy.lima import HYBRID_STATUS
+from longplexpy.lima import TRANSITION_DOUBLE_ASSIGNED
+from longplexpy.lima import TRANSITION_DOUBLE_ASSIGNED_CONFLICT
+from longplexpy.lima import TRANSITION_I7_AND_I5_ONLY
+from longplexpy.lima import TRANSITION_I7_OR_I5_ONLY
+from longplexpy.lima import TRANSITION_UNASSIGNED
+from longplexpy.lima import UNASSIGNED_STATE
+from longplexpy.lima import LimaReportMetric
+from longplexpy.lima import StageFlowMetric
+from longplexpy.lima import ZmwTransitionMetric
+from longplexpy.malformed import OnMalformed
+from longplexpy.prometheus import RUN_METRICS
+from longplexpy.tools.reconcile_demux_stages import reconcile_demux_stages
+
+
+def test_reconcile_demux_stages(tmp_path: Path) -> None:
+    i7_i5_rows = [
+        LimaReportMetric(
+            ZMW="m1/2/ccs",
+            IdxLowestNamed="seqwell_UDI1_A01_P5",
+            IdxHighestNamed="seqwell_UDI1_A01_P7",
+        ),
+        LimaReportMetric(
+            ZMW="m1/10/ccs",
+            IdxLowestNamed="seqwell_UDI1_A01_P5",
+            IdxHighestNamed="seqwell_UDI1_B01_P7",
+        ),
+        LimaReportMetric(
+            ZMW="m1/11/ccs",
+            IdxLowestNamed="seqwell_UDI1_B01_P5",
+            IdxHighestNamed="seqwell_UDI1_B01_P7",
+        ),
+        LimaReportMetric(
+            ZMW="m2/1/ccs",
+            IdxLowestNamed="seqwell_UDI1_A01_P5",
+            IdxHighestNamed="seqwell_UDI1_A01_P7",
+        ),
+    ]
+    either_i7_i5_rows = [
+        LimaReportMetric(
+            ZMW="m1/3/ccs",
+            IdxLowestNamed="seqwell_UDI1_B01_P7",
+            IdxHighestNamed="seqwell_UDI1_B01_P7",
+        ),
+        LimaReportMetric(
+            ZMW="m1/10/ccs",
+            IdxLowestNamed="seqwell_UDI1_A01_P5",
+            IdxHighestNamed="seqwell_UDI1_B01_P5",
+        ),
+        LimaReportMetric(
+            ZMW="m1/11/ccs",
+            IdxLowestNamed="seqwell_UDI1_B01_P7",
+            IdxHighestNamed="seqwell_UDI1_B01_P7",
+        ),
+        LimaReportMetric(
+            ZMW="m2/1/ccs",
+            IdxLowestNamed="seqwell_UDI1_C01_P5",
+            IdxHighestNamed="seqwell_UDI1_C01_P5",
+        ),
+    ]
+    i7_i5_path = tmp_path / "i7_i5.lima.report"
+    either_i7_i5_path = tmp_path / "either_i7_i5.lima.report"
+    LimaReportMetric.write(i7_i5_path, *i7_i5_rows)
+    LimaReportMetric.write(either_i7_i5_path, *either_i7_i5_rows)
+    bytes_in, bytes_out = RUN_METRICS.bytes_in, RUN_METRICS.bytes_out
+
+    reconcile_demux_stages(
+        i7_i5_report=i7_i5_path,
+        either_i7_i5_report=either_i7_i5_path,
+        output_prefix=tmp_path / "sample",
+    )
+
+    assert list(ZmwTransitionMetric.read(tmp_path / "sample.zmw_transitions.txt")) == [
+        ZmwTransitionMetric("m1/2/ccs", "A01", UNASSIGNED_STATE, TRANSITION_I7_AND_I5_ONLY),
+        ZmwTransitionMetric("m1/3/ccs", UNASSIGNED_STATE, "B01", TRANSITION_I7_OR_I5_ONLY),
+        ZmwTransitionMetric("m1/10/ccs", HYBRID_STATUS, HYBRID_STATUS, TRANSITION_UNASSIGNED),
+        ZmwTransitionMetric("m1/11/ccs", "B01", "B01", TRANSITION_DOUBLE_ASSIGNED),
+        ZmwTransitionMetric("m2/1/ccs", "A01", "C01", TRANSITION_DOUBLE_ASSIGNED_CONFLICT),
+    ]
+    assert list(StageFlowMetric.read(tmp_path / "sample.stage_flow.txt")) == [
+        StageFlowMetric(well="A01", i7_i5_only=1, double_assigned_conflict=1),
+        StageFlowMetric(well="B01", either_i7_i5_only=1, double_assigned=1),
+    ]
+    assert RUN_METRICS.bytes_in - bytes_in == sum(
+        path.stat().st_size for path in [i7_i5_path, either_i7_i5_path]
+    )
+    assert RUN_METRICS.bytes_out - bytes_out == sum(
+        path.stat().st_size
+        for path in [tmp_path / "sample.zmw_transitions.txt", tmp_path / "sample.stage_flow.txt"]
+    )
+
+
+def test_reconcile_demux_stages_with_passed_filters(tmp_path: Path) -> None:
+    """Test that ZMWs which did not pass filters are unassigned, without checking barcodes."""
+    header = "ZMW\tIdxLowestNamed\tIdxHighestNamed\tPassedFilters\n"
+    i7_i5_path = tmp_path / "i7_i5.lima.report"
+    either_i7_i5_path = tmp_path / "either_i7_i5.lima.report"
+    i7_i5_path.write_text(
+        header
+        + "m1/1/ccs\tseqwell_UDI1_A01_P5\tseqwell_UDI1_A01_P7\t1\n"
+        + "m1/2/ccs\t-\t-\t0\n"
+        + "m1/3/ccs\t-\t-\t0\n"
+    )
+    either_i7_i5_path.write_text(
+        header
+        + "m1/1/ccs\tseqwell_UDI1_A01_P5\tseqwell_UDI1_A01_P5\t0\n"
+        + "m1/2/ccs\tseqwell_UDI1_B01_P7\tseqwell_UDI1_B01_P7\t1\n"
+        + "m1/3/ccs\tnot_a_barcode\tnot_a_barcode\t0\n"
+    )
+
+    reconcile_demux_stages(
+        i7_i5_report=i7_i5_path,
+        either_i7_i5_report=either_i7_i5_path,
+        output_prefix=tmp_path / "sample",
+        on_malformed=OnMalformed.error,
+    )
+
+    assert list(ZmwTransitionMetric.read(tmp_path / "sample.zmw_transitions.txt")) == [
+        ZmwTransitionMetric("m1/1/ccs", "A01", UNASSIGNED_STATE, TRANSITION_I7_AND_I5_ONLY),
+        ZmwTransitionMetric("m1/2/ccs", UNASSIGNED_STATE, "B01", TRANSITION_I7_OR_I5_ONLY),
+        ZmwTransitionMetric("m1/3/ccs", UNASSIGNED_STATE, UNASSIGNED_STATE, TRANSITION_UNASSIGNED),
+    ]
+    assert list(StageFlowMetric.read(tmp_path / "sample.stage_flow.txt")) == [
+        StageFlowMetric(well="A01", i7_i5_only=1),
+        StageFlowMetric(well="B01", either_i7_i5_only=1),
+    ]
+
+
+def test_reconcile_demux_stages_raises_value_error_when_unsorted(tmp_path: Path) -> None:
+    rows = [
+        LimaReportMetric(
+            ZMW="m1/10/ccs",
+            IdxLowestNamed="seqwell_UDI1_A01_P5",
+            IdxHighestNamed="seqwell_UDI1_A01_P7",
+        ),
+        LimaReportMetric(
+            ZMW="m1/2/ccs",
+            IdxLowestNamed="seqwell_UDI1_A01_P5",
+            IdxHighestNamed="seqwell_UDI1_A01_P7",
+        ),
+    ]
+    report_path = tmp_path / "unsorted.lima.report"
+    LimaReportMetric.write(report_path, *rows)
+
+    with pytest.raises(ValueError, match="not sorted"):
+        reconcile_demux_stages(
+            i7_i5_report=report_path,
+            either_i7_i5_report=report_path,
+            output_prefix=tmp_path / "sample",
+        )
@@ -0,0 +1,149 @@
+from pathlib import Path
+
+import pytest
+
+from longplexpy.lima import HYBRID_STATUS
+from longplexpy.lima import LimaReportMetric
+from longplexpy.prometheus import RUN_METRICS
+from longplexpy.tools.split_lima_report import OPEN_FILES_HEADROOM
+from longplexpy.tools.split_lima_report import ShardBy
+from longplexpy.tools.split_lima_report import ShardWriterPool
+from longplexpy.tools.split_lima_report import default_max_open_files
+from longplexpy.tools.split_lima_report import split_lima_report
+
+REPORT_ROWS = [
+    LimaReportMetric(
+        ZMW="m1/1/ccs", IdxLowestNamed="seqwell_UDI1_A01_P5", IdxHighestNamed="seqwell_UDI1_A01_P7"
+    ),
+    LimaReportMetric(
+        ZMW="m1/2/ccs", IdxLowestNamed="seqwell_UDI1_B01_P5", IdxHighestNamed="seqwell_UDI1_B01_P5"
+    ),
+    LimaReportMetric(
+        ZMW="m2/3/ccs", IdxLowestNamed="seqwell_UDI3_A01_P5", IdxHighestNamed="seqwell_UDI3_A01_P5"
+    ),
+    LimaReportMetric(
+        ZMW="m2/4/ccs", IdxLowestNamed="seqwell_UDI1_A01_P5", IdxHighestNamed="seqwell_UDI1_A02_P7"
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "shard_by, expected_shards",
+    [
+        (
+            ShardBy.well,
+            {
+                "A01": [REPORT_ROWS[0], REPORT_ROWS[2]],
+                "B01": [REPORT_ROWS[1]],
+                HYBRID_STATUS: [REPORT_ROWS[3]],
+            },
+        ),
+        (
+            ShardBy.barcode_set,
+            {
+                "UDI1": [REPORT_ROWS[0], REPORT_ROWS[1], REPORT_ROWS[3]],
+                "UDI3": [REPORT_ROWS[2]],
+            },
+        ),
+        (
+            ShardBy.movie,
+            {
+                "m1": [REPORT_ROWS[0], REPORT_ROWS[1]],
+                "m2": [REPORT_ROWS[2], REPORT_ROWS[3]],
+            },
+        ),
+    ],
+)
+@pytest.mark.parametrize("max_open_files", [1, 128])
+def test_split_lima_report(
+    tmp_path: Path,
+    shard_by: ShardBy,
+    expected_shards: dict[str, list[LimaReportMetric]],
+    max_open_files: int,
+) -> None:
+    report_path = tmp_path / "sample.lima.report"
+    output_dir = tmp_path / "shards"
+    LimaReportMetric.write(report_path, *REPORT_ROWS)
+
+    split_lima_report(
+        lima_report=report_path,
+        output_dir=output_dir,
+        shard_by=shard_by,
+        prefix="sample.",
+        max_open_files=max_open_files,
+    )
+
+    observed_shards = {
+        path.name.removeprefix("sample.").removesuffix(".lima.report"): list(
+            LimaReportMetric.read(path)
+        )
+        for path in output_dir.iterdir()
+    }
+    assert observed_shards == expected_shards
+
+
+def test_split_lima_report_more_shards_than_open_files(tmp_path: Path) -> None:
+    """Test rows interleaved across the wells of a 384-well plate with few open files."""
+    wells = [f"{row}{column:02d}" for row in "ABCDEFGHIJKLMNOP" for column in range(1, 25)]
+    rows = [
+        LimaReportMetric(
+            ZMW=f"m1/{i}/ccs",
+            IdxLowestNamed=f"seqwell_UDI1_{wells[i % len(wells)]}_P5",
+            IdxHighestNamed=f"seqwell_UDI1_{wells[i % len(wells)]}_P7",
+        )
+        for i in range(3 * len(wells))
+    ]
+    report_path = tmp_path / "sample.lima.report"
+    output_dir = tmp_path / "shards"
+    LimaReportMetric.write(report_path, *rows)
+
+    split_lima_report(lima_report=report_path, output_dir=output_dir, max_open_files=16)
+
+    assert len(list(output_dir.iterdir())) == len(wells)
+    for i, well in enumerate(wells):
+        # every shard has a single header and its rows in input order
+        assert (
+            list(LimaReportMetric.read(output_dir / f"{well}.lima.report")) == rows[i :: len(wells)]
+        )
+
+
+def test_default_max_open_files() -> None:
+    resource = pytest.importorskip("resource")
+    soft_limit, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft_limit != resource.RLIM_INFINITY:
+        assert default_max_open_files() == max(1, soft_limit - OPEN_FILES_HEADROOM)
+    pool = ShardWriterPool(output_dir=Path("."), header="")
+    assert pool.max_open_files == default_max_open_files()
+
+
+def test_split_lima_report_counts_bytes(tmp_path: Path) -> None:
+    report_path = tmp_path / "sample.lima.report"
+    output_dir = tmp_path / "shards"
+    LimaReportMetric.write(report_path, *REPORT_ROWS)
+    bytes_in, bytes_out = RUN_METRICS.bytes_in, RUN_METRICS.bytes_out
+
+    split_lima_report(lima_report=report_path, output_dir=output_dir, max_open_files=1)
+
+    assert RUN_METRICS.bytes_in - bytes_in == report_path.stat().st_size
+    assert RUN_METRICS.bytes_out - bytes_out == sum(
+        path.stat().st_size for path in output_dir.iterdir()
+    )
+
+
+def test_shard_writer_pool_evicts_least_recently_used(tmp_path: Path) -> None:
+    with ShardWriterPool(output_dir=tmp_path, header="header\n", max_open_files=2) as pool:
+        first = pool.get("a")
+        pool.get("b")
+        pool.get("a")
+        pool.get("c")
+        assert not first.closed
+        assert set(pool._handles.keys()) == {"a", "c"}
+        pool.get("b").write("row\n")
+
+    assert (tmp_path / "b.lima.report").read_text() == "header\nrow\n"
+    assert set(pool.paths.keys()) == {"a", "b", "c"}
+
+
+def test_shard_writer_pool_raises_value_error_without_open_files(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        ShardWriterPool(output_dir=tmp_path, header="header\n", max_open_files=0)